@@ -0,0 +1,189 @@
+# ==========================================
+# 价格提醒 (Price Alerts)
+# 所有用户的提醒规则按列存放在一组 NumPy 数组里 (用户序号 / 基金行号 / 类型 / 阈值 / 成本)，
+# 每个新的行情快照版本对全部规则做一次向量化判断。
+# 规则登记时统一改写成 "取值 > 界限"：取值来自每只基金的 [净值, -净值, |涨跌幅|] 三元组，
+# 判断只需一次 take 和一次比较，与规则类型无关。
+# 条件从不满足变为满足时只提醒一次 (去重)，条件解除后重新布防；
+# 提醒放进用户的站内收件箱，会话下一次刷新时弹出。
+# ==========================================
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+NAV_ABOVE = 0
+NAV_BELOW = 1
+CHANGE_ABS = 2  # |涨跌幅| 超过阈值 (%)
+DRAWDOWN = 3    # 相对持仓成本的回撤超过阈值 (%)
+
+ALERT_KINDS = {
+    NAV_ABOVE: "净值高于",
+    NAV_BELOW: "净值低于",
+    CHANGE_ABS: "涨跌幅绝对值超过",
+    DRAWDOWN: "较持仓成本回撤超过",
+}
+
+# 每个用户收件箱保留的未读条数
+INBOX_SIZE = 50
+
+
+class AlertBook:
+    """全部用户的提醒规则 (列式) + 站内收件箱；规则 id 为行号，删除后置为失效并由下一条新规则复用"""
+
+    def __init__(self, capacity=1024):
+        self._n = 0
+        self._user = np.zeros(capacity, dtype=np.int32)
+        self._fund_row = np.zeros(capacity, dtype=np.int32)
+        self._kind = np.zeros(capacity, dtype=np.int8)
+        self._threshold = np.zeros(capacity)
+        self._cost = np.zeros(capacity)   # 回撤提醒的平均成本 (每份)
+        self._col = np.zeros(capacity, dtype=np.intp)  # 在取值数组中的位置 (3 × 基金行号 + 分量)
+        self._bound = np.full(capacity, np.inf)        # 取值超过界限即触发；失效规则为 inf
+        self._fired = np.zeros(capacity, dtype=bool)  # 上次判断时条件是否满足
+        self._uids = []
+        self._user_of = {}   # uid -> 用户序号
+        self._rules_of = {}  # 用户序号 -> {(基金行号, 类型): 规则 id}
+        self._free = []      # 已删除、可复用的规则 id
+        self._inbox = {}     # uid -> deque[(规则 id, 净值, 涨跌幅, 时间)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(map(len, self._rules_of.values()))
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, attr).nbytes for attr in self._COLUMNS)
+
+    _COLUMNS = ("_user", "_fund_row", "_kind", "_threshold", "_cost", "_col", "_bound", "_fired")
+
+    def _grow(self):
+        cap = len(self._user) * 2
+        for attr in self._COLUMNS:
+            old = getattr(self, attr)
+            new = np.full(cap, np.inf) if attr == "_bound" else np.zeros(cap, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, attr, new)
+
+    def _compile(self, i):
+        """把规则 i 改写成 取值[col] > bound"""
+        row, kind, threshold, cost = int(self._fund_row[i]), int(self._kind[i]), self._threshold[i], self._cost[i]
+        if kind == NAV_ABOVE:
+            col, bound = 0, threshold
+        elif kind == NAV_BELOW:
+            col, bound = 1, -threshold
+        elif kind == CHANGE_ABS:
+            col, bound = 2, threshold
+        else:
+            # 回撤 (1 - 净值 / 成本) × 100 > 阈值  <=>  -净值 > -成本 × (1 - 阈值 / 100)
+            col, bound = 1, (-cost * (1 - threshold / 100) if cost > 0 else np.inf)
+        self._col[i] = 3 * row + col
+        self._bound[i] = bound
+
+    def _user_index(self, uid):
+        u = self._user_of.get(uid)
+        if u is None:
+            u = self._user_of[uid] = len(self._uids)
+            self._uids.append(uid)
+        return u
+
+    def has_user(self, uid):
+        return uid in self._user_of
+
+    def set_rule(self, uid, fund_row, kind, threshold, cost=0.0):
+        """新增或修改一条规则 (同一用户、基金、类型只保留一条)，返回规则 id"""
+        with self._lock:
+            u = self._user_index(uid)
+            own = self._rules_of.setdefault(u, {})
+            i = own.get((fund_row, kind))
+            if i is None:
+                if self._free:
+                    i = self._free.pop()
+                else:
+                    if self._n == len(self._user):
+                        self._grow()
+                    i = self._n
+                    self._n += 1
+                own[(fund_row, kind)] = i
+                self._user[i], self._fund_row[i], self._kind[i] = u, fund_row, kind
+            self._threshold[i] = threshold
+            self._cost[i] = cost
+            self._fired[i] = False
+            self._compile(i)
+            return i
+
+    def remove_rule(self, uid, fund_row, kind):
+        with self._lock:
+            i = self._rules_of.get(self._user_of.get(uid), {}).pop((fund_row, kind), None)
+            if i is None:
+                return
+            self._bound[i] = np.inf
+            self._fired[i] = False
+            self._free.append(i)
+            # 收件箱里该规则的未读提醒一并丢弃 (规则 id 之后会分给别的规则)
+            box = self._inbox.get(uid)
+            if box:
+                self._inbox[uid] = deque((item for item in box if item[0] != i), maxlen=INBOX_SIZE)
+
+    def set_cost(self, uid, fund_row, cost):
+        """持仓成本变化 (交易后) 时更新该基金的回撤提醒"""
+        with self._lock:
+            i = self._rules_of.get(self._user_of.get(uid), {}).get((fund_row, DRAWDOWN))
+            if i is not None:
+                self._cost[i] = cost
+                self._compile(i)
+
+    def rules(self, uid, fund_row=None):
+        """用户的有效规则：[(基金行号, 类型, 阈值)]，按类型排序"""
+        with self._lock:
+            own = self._rules_of.get(self._user_of.get(uid), {})
+            return sorted((row, kind, float(self._threshold[i])) for (row, kind), i in own.items()
+                          if fund_row is None or row == fund_row)
+
+    def evaluate(self, nav, change, quoted=None):
+        """对全部规则做一次判断，返回新触发的规则 id 数组；
+        quoted 给出时，还没有行情的基金 (nav 只是占位值) 上的规则既不触发也不解除"""
+        values = np.empty(3 * len(nav))
+        values[0::3] = nav
+        np.negative(nav, out=values[1::3])
+        np.abs(change, out=values[2::3])
+        with self._lock:
+            n = self._n
+            hit = values.take(self._col[:n]) > self._bound[:n]
+            fired = self._fired[:n]
+            if quoted is None:
+                new = np.flatnonzero(hit > fired)
+                fired[:] = hit
+            else:
+                live = quoted.take(self._fund_row[:n])
+                new = np.flatnonzero((hit & live) > fired)
+                np.copyto(fired, hit, where=live)
+            if len(new):
+                now = time.time()
+                rows = self._fund_row[new]
+                users, uids, inbox = self._user[new].tolist(), self._uids, self._inbox
+                for i, u, v, c in zip(new.tolist(), users, nav[rows].tolist(), change[rows].tolist()):
+                    box = inbox.get(uids[u])
+                    if box is None:
+                        box = inbox[uids[u]] = deque(maxlen=INBOX_SIZE)
+                    box.append((i, v, c, now))
+            return new
+
+    def pop_inbox(self, uid):
+        """取出并清空用户的未读提醒：[(基金行号, 类型, 阈值, 净值, 涨跌幅, 时间)]"""
+        with self._lock:
+            box = self._inbox.pop(uid, None)
+            if not box:
+                return []
+            return [(int(self._fund_row[i]), int(self._kind[i]), float(self._threshold[i]), v, c, t)
+                    for i, v, c, t in box]
+
+
+def describe(kind, threshold):
+    """规则的中文描述"""
+    unit = "" if kind in (NAV_ABOVE, NAV_BELOW) else "%"
+    return f"{ALERT_KINDS[kind]} {threshold:g}{unit}"
+
+
+alert_book = AlertBook()
@@ -0,0 +1 @@
+# 性能基准 (Benchmarks)，在仓库根目录以 `python -m bench.<name>` 运行
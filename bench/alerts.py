@@ -0,0 +1,103 @@
+"""价格提醒：100 万条规则 (10 万用户 × 2000 只基金) 每个行情快照的判断耗时
+
+  python     逐条规则判断 (在 --sample 条规则上测量后按比例推算)
+  vectorized AlertBook.evaluate：一次向量化判断 + 去重 + 投递到收件箱
+
+用法: python -m bench.alerts [--rules 1000000] [--users 100000] [--funds 2000] [--ticks 20]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from alerts import CHANGE_ABS, DRAWDOWN, NAV_ABOVE, NAV_BELOW, AlertBook
+
+
+def python_evaluate(rules, nav, change, fired):
+    new = []
+    for i, (row, kind, threshold, cost) in enumerate(rules):
+        if kind == NAV_ABOVE:
+            hit = nav[row] > threshold
+        elif kind == NAV_BELOW:
+            hit = nav[row] < threshold
+        elif kind == CHANGE_ABS:
+            hit = abs(change[row]) > threshold
+        else:
+            hit = cost > 0 and (1 - nav[row] / cost) * 100 > threshold
+        if hit and not fired[i]:
+            new.append(i)
+        fired[i] = hit
+    return new
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--funds", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--sample", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    nav = rng.uniform(0.5, 3, args.funds)
+    change = rng.normal(0, 1, args.funds)
+    users = rng.integers(0, args.users, args.rules)
+    rows = rng.integers(0, args.funds, args.rules)
+    kinds = rng.integers(0, 4, args.rules)
+    # 阈值在当前值附近，行情波动时有一部分规则会穿越
+    thresholds = np.select(
+        [kinds == NAV_ABOVE, kinds == NAV_BELOW, kinds == CHANGE_ABS],
+        [nav[rows] * rng.uniform(1.0, 1.03, args.rules), nav[rows] * rng.uniform(0.97, 1.0, args.rules),
+         rng.uniform(1, 3, args.rules)],
+        rng.uniform(1, 10, args.rules))
+    costs = np.where(kinds == DRAWDOWN, nav[rows] * rng.uniform(0.9, 1.1, args.rules), 0.0)
+
+    book = AlertBook()
+    t0 = time.perf_counter()
+    for u, r, k, th, c in zip(users.tolist(), rows.tolist(), kinds.tolist(), thresholds.tolist(), costs.tolist()):
+        book.set_rule(f"user-{u}", r, k, th, c)
+    load_s = time.perf_counter() - t0
+    nbytes = book.nbytes
+    print(f"rules={len(book)} users={args.users} funds={args.funds}")
+    print(f"registering: {load_s:.1f}s, rule columns {nbytes / 2**20:.1f} MiB")
+
+    sample = [(rows[i], kinds[i], thresholds[i], costs[i]) for i in range(min(args.sample, args.rules))]
+    fired_py = [False] * len(sample)
+    nav_l, change_l = nav.tolist(), change.tolist()
+
+    vec_ms, py_ms, fired = [], [], []
+    book.evaluate(nav, change)
+    python_evaluate(sample, nav_l, change_l, fired_py)
+    for _ in range(args.ticks):
+        # 每个快照约三成基金的估值变化
+        moved = rng.random(args.funds) < 0.3
+        nav = np.where(moved, nav * (1 + rng.normal(0, 0.005, args.funds)), nav)
+        change = np.where(moved, change + rng.normal(0, 0.3, args.funds), change)
+        t0 = time.perf_counter()
+        new = book.evaluate(nav, change)
+        vec_ms.append((time.perf_counter() - t0) * 1000)
+        fired.append(len(new))
+
+        nav_l, change_l = nav.tolist(), change.tolist()
+        t0 = time.perf_counter()
+        python_evaluate(sample, nav_l, change_l, fired_py)
+        py_ms.append((time.perf_counter() - t0) * 1000 * args.rules / len(sample))
+
+    # 行情未穿越任何阈值时 (无投递) 的纯判断耗时
+    quiet = []
+    for _ in range(args.ticks):
+        t0 = time.perf_counter()
+        book.evaluate(nav, change)
+        quiet.append((time.perf_counter() - t0) * 1000)
+
+    print(f"quiet tick (no transitions): median {statistics.median(quiet):.1f}ms")
+    print(f"per tick: vectorized median {statistics.median(vec_ms):.1f}ms max {max(vec_ms):.1f}ms"
+          f" | python (extrapolated) median {statistics.median(py_ms):.0f}ms")
+    print(f"alerts delivered per tick: median {statistics.median(fired):.0f}"
+          f" (transitions only; {sum(fired)} over {args.ticks} ticks)")
+
+
+if __name__ == "__main__":
+    main()
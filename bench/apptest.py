@@ -0,0 +1,75 @@
+"""用 Streamlit AppTest 无界面地驱动 app.py 的公用工具"""
+import os
+import tempfile
+import time
+from functools import partial
+
+import streamlit.testing.v1.local_script_runner as local_runner
+from streamlit.testing.v1 import AppTest
+
+import quotes
+from bench.stub_server import start_stub_server
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def start_app(latency=0.02, timeout=60, **stub_options):
+    """启动桩服务器并让行情请求指向它；本地存储放到临时目录。返回 (AppTest, server)
+
+    stub_options 透传给 start_stub_server (error_rate / fund_count / seed)。
+    """
+    server, base = start_stub_server(latency=latency, **stub_options)
+    quotes.FUNDGZ_BASE = base
+    tmp = tempfile.mkdtemp(prefix="gugu-bench-")
+    os.environ.setdefault("GUGU_DB_PATH", os.path.join(tmp, "bench.db"))
+    os.environ.setdefault("GUGU_NAV_DIR", os.path.join(tmp, "nav"))
+    return new_session(timeout), server
+
+
+def new_session(timeout=60):
+    """新的浏览器会话 (同一进程内共享行情缓存、轮询线程与本地存储)"""
+    return AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+
+def fragment_ids(at):
+    """上一次运行中注册的 fragment id"""
+    return list(at._fragment_storage._fragments)
+
+
+def measured_run(at, fragment_ids=()):
+    """运行一次 (整页或只跑指定 fragment)，返回 (脚本线程 CPU 毫秒, 发往浏览器的字节数, 脚本墙钟毫秒)
+
+    通过替换 LocalScriptRunner 使用的 RerunData / 消息解析函数和脚本执行入口实现：
+    CPU 与墙钟只统计脚本线程执行 app 的部分，不含 AppTest 自身的开销；
+    字节数为本次运行产生的全部 ForwardMsg 序列化大小。
+    """
+    sizes, timings = [], []
+    runner_cls = local_runner.LocalScriptRunner
+    orig_rerun_data = local_runner.RerunData
+    orig_parse = local_runner.parse_tree_from_messages
+    orig_run_script = runner_cls._run_script
+
+    def parse(msgs):
+        sizes.append(sum(m.ByteSize() for m in msgs))
+        return orig_parse(msgs)
+
+    def run_script(self, *args, **kwargs):
+        cpu0, wall0 = time.thread_time(), time.perf_counter()
+        try:
+            return orig_run_script(self, *args, **kwargs)
+        finally:
+            timings.append(((time.thread_time() - cpu0) * 1000, (time.perf_counter() - wall0) * 1000))
+
+    if fragment_ids:
+        local_runner.RerunData = partial(orig_rerun_data, fragment_id_queue=list(fragment_ids), is_auto_rerun=True)
+    local_runner.parse_tree_from_messages = parse
+    runner_cls._run_script = run_script
+    try:
+        at.run()
+    finally:
+        local_runner.RerunData = orig_rerun_data
+        local_runner.parse_tree_from_messages = orig_parse
+        runner_cls._run_script = orig_run_script
+    cpu = sum(t[0] for t in timings)
+    wall = sum(t[1] for t in timings)
+    return cpu, sizes[0] if sizes else 0, wall
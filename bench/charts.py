@@ -0,0 +1,59 @@
+"""详情页走势图：历史长度不同时的构建耗时与图表 JSON 大小 (全量点 vs 聚合 + LTTB + 缓存)
+
+用法: python -m bench.charts [--years 1 5 20]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+import charts
+from navstore import NavStore
+
+
+def full_figure(dates, navs):
+    """旧做法：全部点直接画成折线"""
+    fig = go.Figure(go.Scatter(x=dates, y=navs, mode="lines"))
+    fig.update_layout(height=200)
+    return fig
+
+
+def timed_ms(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 20])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NavStore(tmp)
+        charts.nav_store = store
+        print(f"{'history':>8} {'range':>5} {'full_ms':>8} {'full_kb':>8} {'cold_ms':>8} {'cached_ms':>9} {'kb':>6} {'points':>6}")
+        for years in args.years:
+            code = f"{years:06d}"
+            dates = np.arange(np.datetime64("2024-12-31") - years * 365, np.datetime64("2024-12-31"))
+            store.append(code, dates, np.cumprod(1 + rng.normal(0, 0.01, len(dates))))
+            for period in ("1M", "1Y", "3Y", "All"):
+                d, v = store.range(code, charts.CHART_RANGES[period][0])
+                fig, full_ms = timed_ms(lambda: full_figure(d, v).to_json(), repeat=1)
+                full_kb = len(fig) / 1024
+                charts._figure_cache.clear()
+                fig, cold_ms = timed_ms(lambda: charts.chart_figure(code, period).to_json(), repeat=1)
+                _, cached_ms = timed_ms(lambda: charts.chart_figure(code, period))
+                points = len(charts.chart_figure(code, period).data[0].y)
+                print(f"{years:>7}y {period:>5} {full_ms:>8.1f} {full_kb:>8.1f} {cold_ms:>8.1f} {cached_ms:>9.3f}"
+                      f" {len(fig) / 1024:>6.1f} {points:>6}")
+
+
+if __name__ == "__main__":
+    main()
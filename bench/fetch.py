@@ -0,0 +1,63 @@
+"""启动阶段行情获取耗时：逐个请求 vs 批量并发
+
+用法: python -m bench.fetch [--latency 0.02] [--sizes 8 100 1000]
+"""
+import argparse
+import time
+
+import requests
+
+import quotes
+from bench.stub_server import start_stub_server
+
+
+def make_codes(n):
+    # 与 INIT_FUNDS 一样保留一个重复代码
+    codes = [f"{i:06d}" for i in range(1, n)]
+    return codes + codes[:1]
+
+
+def serial_fetch(codes):
+    """旧实现：每个代码新建连接，逐个等待"""
+    out = {}
+    for code in codes:
+        try:
+            r = requests.get(f"{quotes.FUNDGZ_BASE}/js/{code}.js",
+                             headers=quotes.HEADERS, timeout=quotes.FETCH_TIMEOUT)
+            r.encoding = "utf-8"
+            out[code] = quotes.parse_jsonpgz(r.text)
+        except Exception:
+            out[code] = None
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 100, 1000])
+    args = parser.parse_args()
+
+    server, base = start_stub_server(latency=args.latency)
+    quotes.FUNDGZ_BASE = base
+    print(f"stub latency={args.latency * 1000:.0f}ms  deadline={quotes.BATCH_DEADLINE}s  workers={quotes.MAX_WORKERS}")
+    print(f"{'codes':>6} {'serial_s':>9} {'batch_s':>8} {'batch_ok':>9} {'requests':>9}")
+    for n in args.sizes:
+        codes = make_codes(n)
+
+        t0 = time.perf_counter()
+        serial_fetch(codes)
+        serial_s = time.perf_counter() - t0
+
+        quotes.quote_cache.clear()
+        before = server.request_count
+        t0 = time.perf_counter()
+        got = quotes.fetch_fund_data_many(codes)
+        batch_s = time.perf_counter() - t0
+        ok = sum(1 for v in got.values() if v)
+
+        print(f"{n:>6} {serial_s:>9.3f} {batch_s:>8.3f} {ok:>9} {server.request_count - before:>9}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""对账单导入：50 万行 CSV (300 只基金，含约 0.05% 的坏行) 的耗时与峰值内存
+
+  pandas     整表 read_csv 后逐行解析、逐笔 Ledger.append (一次性把整张表读进内存)
+  stream     importer.import_statement：按块解析 + 向量化校验 + Ledger.extend 分批记入
+  stream+db  同上，并每批一个事务写入 SQLite
+
+每种做法在单独的子进程里运行；峰值为导入期间常驻内存 (RSS) 相对导入前的最大增量
+(上传内容本身已在导入前读入内存，与 Streamlit 的 UploadedFile 一致；pandas 也在导入前加载)。
+--newest-first 生成按时间倒序的对账单 (最新在前)，stream 模式会先把记录块暂存到临时文件。
+
+用法: python -m bench.importer [--rows 100000 500000] [--newest-first]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.sysconf("SC_PAGE_SIZE")
+FUNDS = 300
+
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE
+
+
+class PeakSampler(threading.Thread):
+    """每 2ms 采样一次 RSS，记录最大值"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = rss()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(0.002):
+            self.peak = max(self.peak, rss())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, rss())
+
+
+def write_statement(path, rows, seed=0, newest_first=False):
+    """天天基金模板的对账单：日期 YYYY/MM/DD、金额带千分位，按 5 万行一块写出"""
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"{i:06d}" for i in range(1, FUNDS + 1)])
+    blocks = []
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("基金代码,确认日期,业务类型,确认金额,确认净值,确认份额\n")
+        for lo in range(0, rows, 50_000):
+            n = min(50_000, rows - lo)
+            days = np.datetime64("2015-01-01") + np.sort(rng.integers(0, 3650, n)) + (lo // 50_000) * 3650
+            side = np.where(rng.random(n) < 0.2, "赎回", "申购")
+            amount, nav = rng.uniform(100, 5000, n), rng.uniform(0.8, 3, n)
+            code = codes[rng.integers(0, FUNDS, n)]
+            lines = [f"{c},{str(d).replace('-', '/')},{s},\"{a:,.2f}\",{v:.4f},"
+                     for c, d, s, a, v in zip(code, days, side, amount, nav)]
+            for i in range(0, n, 2003):  # 坏行：日期、代码、列数
+                lines[i] = ["{},bad,申购,1,1,", "999999,2020/01/01,申购,1,1,", "{},2020/01/01"][i % 3].format(code[i])
+            if newest_first:
+                blocks.append(lines[::-1])
+            else:
+                f.write("\n".join(lines) + "\n")
+        for lines in reversed(blocks):
+            f.write("\n".join(lines) + "\n")
+
+
+def naive_import(data, ledger, store, fund_index):
+    import pandas as pd
+
+    from ledger import BUY, SELL
+
+    df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    sides = {"申购": BUY, "赎回": SELL}
+    imported = failed = 0
+    for code, date, side, amount, nav, _ in df.itertuples(index=False):
+        try:
+            code = code.zfill(6)
+            row = store.index_of_code(code)
+            if row is None:
+                if fund_index.get(code) is None:
+                    raise ValueError("未知基金代码")
+                row = store.add(code, code, "all", 1.0, 0.0, [1.0])
+            ledger.append(row, sides[side], float(amount.replace(",", "")), float(nav),
+                          np.datetime64(date.replace("/", "-"), "D"))
+            imported += 1
+        except (ValueError, KeyError, AttributeError):
+            failed += 1
+    return imported, failed
+
+
+def child(mode, path):
+    import pandas  # noqa: F401  importer 按需导入 pandas；先导入，峰值只统计导入本身
+
+    from importer import import_statement
+    from ledger import Ledger
+    from persistence import UserStore
+    from search import FundIndex
+    from store import FundStore
+
+    with open(path, "rb") as f:
+        data = f.read()
+    fund_index = FundIndex([(f"{i:06d}", f"基金{i}", "JJ", "混合") for i in range(1, FUNDS + 1)])
+    store, ledger = FundStore(), Ledger()
+    user_store = None
+    if mode == "stream+db":
+        user_store = UserStore("bench", os.path.join(os.path.dirname(path), f"import-{os.getpid()}.db"))
+        user_store.create()
+
+    sampler = PeakSampler()
+    before = sampler.peak
+    sampler.start()
+    t0 = time.perf_counter()
+    if mode == "pandas":
+        imported, failed = naive_import(data, ledger, store, fund_index)
+    else:
+        report = import_statement(io.BytesIO(data), "statement.csv", ledger, store, fund_index, user_store)
+        imported, failed = report.imported, report.failed
+    elapsed = time.perf_counter() - t0
+    sampler.stop()
+    # 流水数组 (含倍增预留) 本身随导入笔数增长，单独列出
+    ledger_bytes = sum(getattr(ledger, attr).nbytes for attr in
+                       ("_fund_row", "_side", "_amount", "_nav", "_shares", "_date"))
+    print(json.dumps({"seconds": elapsed, "peak": sampler.peak - before, "ledger": ledger_bytes,
+                      "imported": imported, "failed": failed}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--modes", nargs="+", default=["pandas", "stream", "stream+db"])
+    parser.add_argument("--newest-first", action="store_true")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'rows':>8} {'file MiB':>8} {'mode':>10} {'seconds':>8} {'peak MiB':>9} {'ledger':>7}"
+          f" {'imported':>9} {'failed':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"statement-{rows}.csv")
+            write_statement(path, rows, newest_first=args.newest_first)
+            size = os.path.getsize(path) / 2**20
+            for mode in args.modes:
+                out = subprocess.run([sys.executable, "-m", "bench.importer", "--child", mode, path],
+                                     cwd=ROOT, capture_output=True, text=True, check=True)
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{rows:>8} {size:>8.1f} {mode:>10} {r['seconds']:>8.2f} {r['peak'] / 2**20:>9.1f}"
+                      f" {r['ledger'] / 2**20:>7.1f} {r['imported']:>9} {r['failed']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""交易流水：追加吞吐与每次 rerun 的持仓汇总耗时
+
+用法: python -m bench.ledger [--trades 100000] [--positions 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ledger import Ledger, BUY, SELL
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--positions", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, args.positions, args.trades)
+    navs = rng.uniform(0.5, 3.0, args.trades)
+    amounts = rng.uniform(100, 5000, args.trades)
+    start = np.datetime64("2015-01-01")
+
+    ledger = Ledger()
+    t0 = time.perf_counter()
+    for i in range(args.trades):
+        row = int(rows[i])
+        side = BUY
+        # 约三成卖出，只卖持有份额以内
+        if i % 3 == 0 and ledger.shares_of(row) * navs[i] > amounts[i]:
+            side = SELL
+        ledger.append(row, side, amounts[i], navs[i], start + i // 30)
+    append_s = time.perf_counter() - t0
+
+    nav = rng.uniform(0.5, 3.0, args.positions)
+    change = rng.uniform(-3, 3, args.positions)
+    ledger.summary(nav, change)
+    runs = 200
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        ledger.summary(nav, change)
+    summary_ms = (time.perf_counter() - t0) / runs * 1000
+
+    print(f"trades={len(ledger)} positions={len(ledger.positions()[0])}")
+    print(f"append: {append_s:.2f}s total, {append_s / args.trades * 1e6:.1f}us/trade")
+    print(f"summary per rerun: {summary_ms:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""长自选列表渲染：20 只 vs 2000 只自选的整页 rerun 开销
+
+用法: python -m bench.lists [--sizes 20 200 2000] [--runs 10]
+"""
+import argparse
+import statistics
+
+import numpy as np
+
+from bench.apptest import measured_run, start_app
+from store import Watchlist
+from universe import get_universe
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    at, server = start_app()
+    at.run()
+    store = get_universe()
+    rng = np.random.default_rng(0)
+    for i in range(max(args.sizes)):
+        store.add(f"9{i:05d}", f"测试基金{i}", "tech", rng.uniform(0.5, 3), rng.uniform(-3, 3), [1.0] * 10)
+
+    print(f"{'funds':>6} {'sort':>12} {'cpu_ms':>8} {'wall_ms':>8} {'bytes':>8}")
+    for size in args.sizes:
+        at.session_state.watchlist = Watchlist(store.ids[-size:])
+        at.session_state.view = "WATCHLIST"
+        for sort in ("default", "change_desc"):
+            at.session_state.wl_sort = sort
+            samples = [measured_run(at) for _ in range(args.runs)]
+            cpu = statistics.median(s[0] for s in samples)
+            wall = statistics.median(s[2] for s in samples)
+            size_b = statistics.median(s[1] for s in samples)
+            print(f"{size:>6} {sort:>12} {cpu:>8.1f} {wall:>8.1f} {size_b:>8.0f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
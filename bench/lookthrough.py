@@ -0,0 +1,100 @@
+"""持仓穿透：1000 只基金 × 5000 只证券，组合按证券 / 板块的敞口与按重仓股估算的今日盈亏
+
+  python    逐持仓、逐重仓股累加到 dict (旧式写法)
+  build     由基金表重建稀疏矩阵 (只在持仓变化时发生)
+  select    交易后重新抽取持仓子矩阵
+  matvec    净值变化后重新计算敞口 (一次 bincount)
+  cached    持仓与净值都未变化时直接复用
+
+用法: python -m bench.lookthrough [--funds 1000] [--securities 5000] [--holdings 10 50] [--held 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ledger import BUY, Ledger
+from lookthrough import LookThrough
+from store import FundStore
+
+
+def python_exposure(store, ledger):
+    rows, shares, _ = ledger.positions()
+    by_security, by_sector, pnl = {}, {}, 0.0
+    for row, held in zip(rows.tolist(), shares.tolist()):
+        value = store.nav[row] * held
+        for h in store.holdings[row]:
+            v = value * h["percent"] / 100
+            by_security[h["code"]] = by_security.get(h["code"], 0.0) + v
+            by_sector[h["sectorId"]] = by_sector.get(h["sectorId"], 0.0) + v
+            pnl += v * h["change"] / 100
+    return by_security, by_sector, pnl
+
+
+def best_ms(fn, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=1000)
+    parser.add_argument("--securities", type=int, default=5000)
+    parser.add_argument("--holdings", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--held", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sec_sector = rng.integers(0, 30, args.securities)
+    sec_change = rng.normal(0, 2, args.securities)
+    print(f"funds={args.funds} securities={args.securities} positions={args.held} (ms)")
+    print(f"{'holdings':>8} {'nnz':>7} {'python':>8} {'build':>7} {'select':>7} {'matvec':>7} {'cached':>7}")
+    for k in args.holdings:
+        store = FundStore()
+        for i in range(args.funds):
+            picks = rng.choice(args.securities, k, replace=False)
+            holdings = [{"code": f"S{j}", "name": f"证券{j}", "percent": float(p), "change": float(sec_change[j]),
+                         "sectorId": f"s{sec_sector[j]}"} for j, p in zip(picks, rng.uniform(0.5, 8, k))]
+            store.add(f"{i:06d}", f"基金{i}", "all", float(rng.uniform(0.8, 3)), 0.0, [1.0], holdings,
+                      gztime="2024-01-02 15:00")
+        ledger = Ledger()
+        for row in rng.choice(args.funds, min(args.held, args.funds), replace=False).tolist():
+            ledger.append(row, BUY, 1000.0, float(store.nav[row]), "2024-05-20")
+
+        engine = LookThrough()
+        by_security, by_sector, pnl = python_exposure(store, ledger)
+        result = engine.exposure(store, ledger)
+        matrix = engine.matrix(store)
+        assert np.isclose(sum(by_security.values()), result["by_security"].sum())
+        assert np.isclose(by_sector["s0"], result["by_sector"][matrix.sectors.index("s0")])
+        assert np.isclose(pnl, engine.day_gain(store, ledger))
+
+        py_ms = best_ms(lambda: python_exposure(store, ledger), repeat=3)
+
+        def rebuild():
+            store.holdings_version += 1
+            engine.exposure(store, ledger)
+
+        def trade():
+            ledger.version += 1
+            engine.exposure(store, ledger)
+
+        def tick():
+            store.update_quotes([0], store.nav[0] + 1e-4, 0.0)
+            engine.exposure(store, ledger)
+            engine.day_gain(store, ledger)
+
+        build_ms = best_ms(rebuild, repeat=3)
+        select_ms = best_ms(trade)
+        matvec_ms = best_ms(tick)
+        cached_ms = best_ms(lambda: engine.exposure(store, ledger))
+        print(f"{k:>8} {len(matrix.indices):>7} {py_ms:>8.2f} {build_ms:>7.2f} {select_ms:>7.2f}"
+              f" {matvec_ms:>7.3f} {cached_ms:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""历史净值库：批量导入与打开基金时的区间读取耗时
+
+生成 N 只基金 × Y 年的日净值 CSV 作为导入文件，再用全新的 NavStore
+(冷启动，未映射任何文件) 读取各个区间。
+用法: python -m bench.navstore [--funds 50] [--years 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from navstore import NavStore, RANGES
+
+
+def write_fixture(path, funds, years):
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(end="2026-01-01", periods=years * 250)
+    frames = []
+    for i in range(funds):
+        navs = np.cumprod(1 + rng.normal(0.0003, 0.012, len(dates)))
+        frames.append(pd.DataFrame({"code": f"{i:06d}", "date": dates.strftime("%Y-%m-%d"), "nav": navs.round(4)}))
+    pd.concat(frames).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=50)
+    parser.add_argument("--years", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "navs.csv")
+        write_fixture(csv_path, args.funds, args.years)
+
+        store = NavStore(os.path.join(tmp, "nav"))
+        t0 = time.perf_counter()
+        rows = store.ingest_csv(csv_path)
+        ingest_s = time.perf_counter() - t0
+        print(f"ingest: {rows} rows in {ingest_s:.2f}s")
+
+        # 每只基金用新实例读取，相当于首次打开详情页
+        for period in RANGES:
+            times = []
+            for i in range(args.funds):
+                cold = NavStore(store.root)
+                t0 = time.perf_counter()
+                dates, navs = cold.range(f"{i:06d}", period)
+                times.append(time.perf_counter() - t0)
+            shared = np.shares_memory(navs, cold._records(f"{args.funds - 1:06d}"))
+            print(f"{period:>4}: {len(navs):>5} points  median {np.median(times) * 1000:.3f}ms"
+                  f"  max {max(times) * 1000:.3f}ms  zero-copy={shared}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""本地存储冷启动：一次批量读取并恢复自选与持仓
+
+用法: python -m bench.persistence [--watchlist 1000] [--trades 50000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from ledger import BUY
+from persistence import UserStore, restore_session
+from store import FundStore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--watchlist", type=int, default=1000)
+    parser.add_argument("--trades", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    codes = [f"{i:06d}" for i in range(args.watchlist)]
+    trade_codes = rng.choice(codes, args.trades)
+    navs = rng.uniform(0.5, 3.0, args.trades)
+    amounts = rng.uniform(100, 5000, args.trades)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        user = UserStore("bench-user", path)
+        t0 = time.perf_counter()
+        user.create(
+            funds=[(c, f"基金{c}", "all") for c in codes],
+            watchlist=[(c, "tech" if i % 2 else None) for i, c in enumerate(codes)],
+            trades=[(c, BUY, float(a), float(n), float(a / n), "2020-01-01")
+                    for c, a, n in zip(trade_codes, amounts, navs)],
+            positions=[(c, 100.0, 150.0) for c in codes],
+        )
+        seed_s = time.perf_counter() - t0
+
+        # 冷启动：新的基金表 + 一次批量读取 + 恢复
+        t0 = time.perf_counter()
+        state = UserStore("bench-user", path).load()
+        load_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        watchlist, ledger = restore_session(state, FundStore())
+        restore_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        user.watch_removed(codes[0])
+        write_ms = (time.perf_counter() - t0) * 1000
+
+    print(f"watchlist={len(watchlist)} trades={len(ledger)} positions={len(ledger.positions()[0])}")
+    print(f"seed (one transaction): {seed_s:.2f}s")
+    print(f"cold start: load {load_s * 1000:.1f}ms + restore {restore_s * 1000:.1f}ms"
+          f" = {(load_s + restore_s) * 1000:.1f}ms")
+    print(f"incremental write (unstar): {write_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""实时刷新开销：整页 rerun vs 单个行情磁贴 (fragment) 重绘
+
+用法: python -m bench.refresh [--runs 20]
+"""
+import argparse
+import statistics
+
+from bench.apptest import fragment_ids, measured_run, start_app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    at, server = start_app()
+    at.run()
+    print(f"{'view':>10} {'mode':>9} {'cpu_ms':>8} {'bytes':>8}")
+    for view in ("PORTFOLIO", "WATCHLIST", "MARKET"):
+        at.session_state.view = view
+        at.run()
+        tiles = fragment_ids(at)
+        for mode, ids in (("full", ()), ("one tile", tiles[:1])):
+            samples = [measured_run(at, ids) for _ in range(args.runs)]
+            cpu = statistics.median(s[0] for s in samples)
+            size = statistics.median(s[1] for s in samples)
+            print(f"{view:>10} {mode:>9} {cpu:>8.2f} {size:>8.0f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""上游劣化时的行情获取：固定超时 vs 自适应超时 + 熔断 + 陈旧数据兜底
+
+桩服务器按 --timeout-rate 的比例挂起请求 (远超客户端超时)，分别测量：
+  batch   启动时批量获取 (整体截止时间内) 的耗时与拿到的代码数
+  single  逐个获取新代码 (搜索/打开详情) 的延迟分布
+  expired 缓存过期后再次读取：延迟与返回陈旧数据 / 无数据的比例
+  page    AppTest 冷启动会话与详情页 rerun 的耗时
+
+用法: python -m bench.resilience [--timeout-rate 0.5] [--codes 100]
+"""
+import argparse
+import statistics
+import time
+
+import quotes
+from bench.apptest import measured_run, new_session, start_app
+
+MODES = {
+    # 旧行为：固定 1s 超时、不熔断、过期即重新获取
+    "fixed": {"LATENCY_MIN_SAMPLES": float("inf"), "BREAKER_MIN_CALLS": float("inf"), "stale_ttl": 0},
+    "adaptive": {"LATENCY_MIN_SAMPLES": quotes.LATENCY_MIN_SAMPLES, "BREAKER_MIN_CALLS": quotes.BREAKER_MIN_CALLS,
+                 "stale_ttl": quotes.STALE_TTL},
+}
+
+
+def configure(mode):
+    opts = MODES[mode]
+    quotes.LATENCY_MIN_SAMPLES = opts["LATENCY_MIN_SAMPLES"]
+    quotes.BREAKER_MIN_CALLS = opts["BREAKER_MIN_CALLS"]
+    quotes._guards.clear()
+    quotes.quote_cache.clear()
+    quotes.quote_cache._stale_ttl = opts["stale_ttl"]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {"p50": statistics.median(samples), "p99": samples[int((len(samples) - 1) * 0.99)], "max": samples[-1]}
+
+
+def bench_mode(mode, server, codes):
+    configure(mode)
+    out = {}
+
+    t0 = time.perf_counter()
+    got = quotes.fetch_fund_data_many(codes[:len(codes) // 2])
+    out["batch"] = f"{(time.perf_counter() - t0) * 1000:.0f}ms, {sum(v is not None for v in got.values())}/{len(codes) // 2} quotes"
+
+    lat, none = [], 0
+    for code in codes[len(codes) // 2:]:
+        t0 = time.perf_counter()
+        none += quotes.fetch_fund_data(code) is None
+        lat.append((time.perf_counter() - t0) * 1000)
+    p = percentiles(lat)
+    out["single"] = f"p50 {p['p50']:.0f}ms p99 {p['p99']:.0f}ms max {p['max']:.0f}ms, {none}/{len(lat)} empty"
+
+    # 让已缓存的条目全部过期后再读
+    cache = quotes.quote_cache
+    with cache._lock:
+        for code, (_, value, _) in list(cache._data.items()):
+            cache._data[code] = (0.0, value, 0.0)
+    lat, stale, none = [], 0, 0
+    for code in codes:
+        t0 = time.perf_counter()
+        data = quotes.fetch_fund_data(code)
+        lat.append((time.perf_counter() - t0) * 1000)
+        none += data is None
+        stale += bool(data and data.get("stale"))
+    p = percentiles(lat)
+    out["expired"] = (f"p50 {p['p50']:.1f}ms p99 {p['p99']:.0f}ms max {p['max']:.0f}ms,"
+                      f" {stale} stale / {none} empty of {len(lat)}")
+
+    quotes.quote_cache.clear()
+    at = new_session()
+    t0 = time.perf_counter()
+    at.run()
+    cold = (time.perf_counter() - t0) * 1000
+    at.session_state.selected_fund = 0
+    walls = [measured_run(at)[2] for _ in range(5)]
+    out["page"] = f"cold session {cold:.0f}ms, detail rerun median {statistics.median(walls):.0f}ms"
+    out["breaker"] = quotes.host_guard().state()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--timeout-rate", type=float, default=0.5)
+    parser.add_argument("--codes", type=int, default=100)
+    args = parser.parse_args()
+
+    _, server = start_app(timeout_rate=args.timeout_rate, stall=3.0)
+    codes = [f"{i:06d}" for i in range(1, args.codes + 1)]
+    print(f"upstream: {args.timeout_rate:.0%} of requests hang; client timeout cap {quotes.FETCH_TIMEOUT}s")
+    for mode in MODES:
+        results = bench_mode(mode, server, [f"{mode[0]}{c[1:]}" for c in codes])
+        print(f"\n[{mode}]")
+        for key, value in results.items():
+            print(f"  {key:>8}: {value}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""风险分析：500 只基金近 1 年的相关矩阵与波动 / 回撤 / 夏普
+
+  pandas   每次从净值库读取 -> 逐只算收益率 -> DataFrame 对齐 -> corr / std / 回撤 (每次 rerun 现算的写法)
+  cold     ReturnWindow 首次构建 + 指标 + 相关矩阵
+  cached   数据未变：RiskEngine.window (含逐只检查数据版本) + 取缓存结果
+  new day  每只基金追加一天净值后：增量滚动 vs 完整重建
+
+用法: python -m bench.risk [--funds 500] [--years 3] [--repeat 5]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from navstore import NavStore
+from risk import RiskEngine, ReturnWindow, RISK_WINDOWS
+
+
+def pandas_risk(store, codes, window=RISK_WINDOWS["1Y"]):
+    import pandas as pd
+
+    series = {}
+    for code in codes:
+        dates, navs = store.recent(code, window * 2 + 1)
+        series[code] = np.log(pd.Series(np.asarray(navs), index=pd.DatetimeIndex(np.asarray(dates)))).diff().iloc[1:]
+    rets = pd.DataFrame(series).iloc[-window:]
+    cum = rets.fillna(0).cumsum()
+    drawdown = 1 - np.exp(-(cum.cummax().clip(lower=0) - cum).max())
+    return rets.corr(min_periods=20), rets.std() * np.sqrt(252), drawdown
+
+
+def best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=500)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    days = np.arange(np.datetime64("2024-12-31") - 365 * args.years, np.datetime64("2024-12-31"))
+    days = days[np.is_busday(days)]
+    codes = [f"{i:06d}" for i in range(args.funds)]
+    market = rng.normal(0, 0.01, len(days))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NavStore(tmp)
+        for i, code in enumerate(codes):
+            # 一部分基金成立较晚、个别交易日缺失
+            start = rng.integers(0, len(days) // 2) if i % 10 == 0 else 0
+            keep = rng.random(len(days) - start) > 0.02
+            rets = rng.uniform(0.2, 1.2) * market + rng.normal(0, 0.008, len(days))
+            store.append(code, days[start:][keep], np.exp(np.cumsum(rets[start:][keep])))
+
+        engine = RiskEngine(store)
+        pandas_ms = best_ms(lambda: pandas_risk(store, codes), args.repeat)
+
+        def cold():
+            engine.clear()
+            win = engine.window(codes, "1Y")
+            win.metrics(), win.correlation()
+
+        cold_ms = best_ms(cold, args.repeat)
+        win = engine.window(codes, "1Y")
+        win.correlation()
+        cached_ms = best_ms(lambda: (engine.window(codes, "1Y").correlation(), win.metrics()), args.repeat)
+
+        # 正确性：与 pandas 的逐对相关 / 波动一致
+        corr, vol, mdd = pandas_risk(store, codes)
+        assert np.allclose(corr.values, win.correlation(), equal_nan=True, atol=1e-9)
+        assert np.allclose(vol.values, win.metrics()["volatility"], atol=1e-9)
+        assert np.allclose(mdd.values, win.metrics()["max_drawdown"], atol=1e-9)
+
+        incr, full = [], []
+        day = days[-1]
+        for _ in range(args.repeat):
+            day = np.busday_offset(day, 1, roll="forward")
+            for code in codes:
+                store.append(code, [day], [store.tail(code, 1)[0] * np.exp(rng.normal(0, 0.01))])
+            # 文件追加后的重新映射是净值库的开销，两种做法都要付；先做掉，只比较分析部分
+            for code in codes:
+                store.version(code)
+            t0 = time.perf_counter()
+            win = engine.window(codes, "1Y")
+            win.metrics(), win.correlation()
+            incr.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            ref = ReturnWindow(win.codes, RISK_WINDOWS["1Y"], store)
+            ref.metrics(), ref.correlation()
+            full.append(time.perf_counter() - t0)
+        assert np.allclose(ref.correlation(), win.correlation(), equal_nan=True, atol=1e-9)
+
+        print(f"funds={args.funds} window={RISK_WINDOWS['1Y']} trading days (ms, best of {args.repeat})")
+        print(f"  pandas per rerun:        {pandas_ms:8.1f}")
+        print(f"  cold build:              {cold_ms:8.1f}")
+        print(f"  cached (no new data):    {cached_ms:8.2f}")
+        print(f"  new day, incremental:    {min(incr) * 1000:8.1f}")
+        print(f"  new day, full rebuild:   {min(full) * 1000:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
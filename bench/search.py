@@ -0,0 +1,56 @@
+"""基金检索：建索引耗时与单次查询延迟
+
+默认使用合成的 2 万只基金；传入 --fund-list 可改用真实列表文件。
+用法: python -m bench.search [--funds 20000] [--fund-list data/fundcode_search.js]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from search import FundIndex, load_fund_list
+
+COMPANIES = [("华夏", "HX"), ("易方达", "YFD"), ("招商", "ZS"), ("南方", "NF"), ("嘉实", "JS"),
+             ("富国", "FG"), ("广发", "GF"), ("汇添富", "HTF"), ("中欧", "ZO"), ("博时", "BS")]
+THEMES = [("成长", "CZ"), ("医疗", "YL"), ("新能源", "XNY"), ("消费", "XF"), ("蓝筹", "LC"),
+          ("中证白酒", "ZZBJ"), ("半导体", "BDT"), ("红利", "HL"), ("军工", "JG"), ("科技", "KJ")]
+KINDS = [("混合", "HH", "混合型"), ("股票", "GP", "股票型"), ("债券", "ZQ", "债券型"),
+         ("指数", "ZS", "指数型"), ("联接A", "LJA", "联接基金")]
+
+
+def synthetic_funds(n):
+    rng = np.random.default_rng(0)
+    out = []
+    for i in range(n):
+        c, cp = COMPANIES[rng.integers(len(COMPANIES))]
+        t, tp = THEMES[rng.integers(len(THEMES))]
+        k, kp, kind = KINDS[rng.integers(len(KINDS))]
+        out.append((f"{i * 7 % 1_000_000:06d}", f"{c}{t}{k}", f"{cp}{tp}{kp}", kind))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=20_000)
+    parser.add_argument("--fund-list")
+    args = parser.parse_args()
+
+    entries = load_fund_list(args.fund_list) if args.fund_list else synthetic_funds(args.funds)
+    t0 = time.perf_counter()
+    index = FundIndex(entries)
+    print(f"index {len(index)} funds in {(time.perf_counter() - t0) * 1000:.0f}ms")
+
+    queries = ["0", "00", "0010", "161725", "h", "hx", "yfdxf", "华", "华夏", "医疗", "中证白酒", "新能源混合", "不存在"]
+    runs = 200
+    for q in queries:
+        index.search(q)
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            res = index.search(q)
+        us = (time.perf_counter() - t0) / runs * 1e6
+        top = res[0][1] if res else "-"
+        print(f"{q!r:>14}: {us:7.1f}us  hits={len(res):>2}  top={top}")
+
+
+if __name__ == "__main__":
+    main()
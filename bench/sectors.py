@@ -0,0 +1,88 @@
+"""板块聚合：10k 只基金 / 100 个板块，每轮部分基金行情变化时的增量更新 vs 全量重算
+
+全量重算分两种：逐板块 Python 循环 (旧式写法)、整表 bincount；增量为 SectorBoard.update + summary。
+每轮结束后校验增量结果与全量重算一致。
+
+用法: python -m bench.sectors [--funds 10000] [--sectors 100] [--changed 0.1 0.5 1.0] [--rounds 50]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from store import FundStore
+
+
+def python_groupby(sector_ids, change):
+    """逐行累加到 dict，再逐板块求领涨基金"""
+    groups = {}
+    for row, (sid, c) in enumerate(zip(sector_ids, change.tolist())):
+        groups.setdefault(sid, []).append((c, row))
+    return {sid: (sum(c for c, _ in g) / len(g), sum(c > 0 for c, _ in g), sum(c < 0 for c, _ in g),
+                  max(g, key=lambda t: abs(t[0]))[1]) for sid, g in groups.items()}
+
+
+def numpy_full(sector, change, n):
+    """整表 bincount + lexsort 求每个板块波动最大的一行"""
+    count = np.bincount(sector, minlength=n)
+    mean = np.bincount(sector, change, minlength=n) / np.maximum(count, 1)
+    up = np.bincount(sector, change > 0, minlength=n)
+    down = np.bincount(sector, change < 0, minlength=n)
+    order = np.lexsort((np.abs(change), sector))
+    last = np.r_[np.flatnonzero(np.diff(sector[order])), len(order) - 1]
+    return mean, up, down, order[last]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=10000)
+    parser.add_argument("--sectors", type=int, default=100)
+    parser.add_argument("--changed", type=float, nargs="+", default=[0.01, 0.1, 0.5, 1.0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    store = FundStore()
+    sector_of = rng.integers(0, args.sectors, args.funds)
+    for i in range(args.funds):
+        store.add(f"{i:06d}", f"基金{i}", f"s{sector_of[i]}", 1.0, float(rng.normal(0, 1)), [1.0],
+                  gztime="2024-01-02 15:00")
+    board = store.sectors
+    sector = board._sector[:len(store)]
+    n = len(board)
+
+    print(f"funds={args.funds} sectors={n} rounds={args.rounds} (ms per refresh)")
+    print(f"{'changed':>8} {'python':>8} {'bincount':>9} {'increment':>10} {'update':>8} {'summary':>8}")
+    for frac in args.changed:
+        k = max(1, int(args.funds * frac))
+        t_py = t_np = t_upd = t_sum = 0.0
+        for i in range(args.rounds):
+            # 轮询快照包含全部基金，其中 k 只的涨跌幅变化
+            change = store.change.copy()
+            moved = rng.choice(args.funds, k, replace=False)
+            change[moved] = np.round(rng.normal(0, 1, k), 2)
+            rows = np.arange(args.funds)
+
+            t0 = time.perf_counter()
+            store.update_quotes(rows, store.nav, change)
+            t1 = time.perf_counter()
+            result = board.summary()
+            t2 = time.perf_counter()
+            full = numpy_full(sector, store.change, n)
+            t3 = time.perf_counter()
+            if i < 3:
+                python_groupby(store.sector_ids, store.change)
+                t_py += time.perf_counter() - t3
+            t_upd += t1 - t0
+            t_sum += t2 - t1
+            t_np += t3 - t2
+
+            assert np.allclose(result["mean"], full[0]) and (result["up"] == full[1]).all()
+            assert (np.abs(store.change[result["top"]]) == np.abs(store.change[full[3]])).all()
+        r = args.rounds
+        print(f"{frac:>8.0%} {t_py / 3 * 1000:>8.2f} {t_np / r * 1000:>9.2f} {(t_upd + t_sum) / r * 1000:>10.2f}"
+              f" {t_upd / r * 1000:>8.2f} {t_sum / r * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
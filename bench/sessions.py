@@ -0,0 +1,114 @@
+"""多会话内存：每个会话各建一张基金表 (旧做法) vs 进程内共享基金池 + 会话只保留持仓/自选覆盖层
+
+每个会话按 app.py 初始化时的内容构建：基金表 (行情、历史、模拟持仓)、交易流水 (两笔买入)、
+三只自选及分组、持仓穿透结果。每组 (模式, 会话数) 在单独的子进程里测量，
+报告创建全部会话后进程的常驻内存 (RSS) 与创建前后的增量；不含 Streamlit 自身的会话开销。
+增量按页统计，单个会话的覆盖层只有几 KiB，可能落在已分配的内存里显示为 0。
+
+超过 --max-mb 的组合不实际运行，按上一档的每会话增量推算 (标 ~)。
+
+用法: python -m bench.sessions [--sessions 1 100 1000] [--funds 8 2000] [--max-mb 2048]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE
+
+
+def new_overlay(store):
+    """会话自己的数据：与 app.py 新用户初始化相同"""
+    from ledger import BUY, Ledger
+    from lookthrough import LookThrough
+    from store import Watchlist
+
+    ledger = Ledger()
+    for row, held, cost_ratio in ((0, 2000, 1.05), (1, 500, 0.95)):
+        cost = store.nav[row] * cost_ratio
+        ledger.append(row, BUY, held * cost, cost, "2024-05-20")
+    ids = store.ids
+    watchlist = Watchlist([ids[2], ids[3], ids[5]], {ids[2]: "tech", ids[3]: "med", ids[5]: "all"})
+    engine = LookThrough()
+    engine.exposure(store, ledger)
+    return {"ledger": ledger, "watchlist": watchlist, "lookthrough": engine}
+
+
+def child(mode, sessions, funds):
+    import lookthrough
+    import quotes
+    import universe
+    from bench.stub_server import start_stub_server, stub_codes
+
+    server, base = start_stub_server(latency=0, fund_count=funds)
+    quotes.FUNDGZ_BASE = base
+    fund_list = universe.INIT_FUNDS if funds <= len(universe.INIT_FUNDS) else [
+        (code, code, f"s{i % 100}") for i, code in enumerate(stub_codes(funds))]
+    quotes.fetch_fund_data_many([code for code, _, _ in fund_list])  # 行情缓存本来就是进程共享的
+
+    def per_session():
+        # 旧做法：每个会话各自构建基金表，穿透矩阵也随会话缓存
+        store = universe.build_universe(fund_list)
+        lookthrough._matrix_cache = (None, None)
+        state = new_overlay(store)
+        state["store"] = store
+        return state
+
+    def shared():
+        return new_overlay(universe.get_universe())
+
+    if mode == "shared":
+        universe._universe = universe.build_universe(fund_list)
+        shared()  # 共享部分 (基金池、穿透矩阵) 在基线之前建好
+    gc.collect()
+    before = rss()
+    states = [per_session() if mode == "per-session" else shared() for _ in range(sessions)]
+    gc.collect()
+    after = rss()
+    server.shutdown()
+    print(json.dumps({"rss": after, "delta": after - before, "sessions": len(states)}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--funds", type=int, nargs="+", default=[8, 2000])
+    parser.add_argument("--max-mb", type=float, default=2048)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, sessions, funds = args.child
+        child(mode, int(sessions), int(funds))
+        return
+
+    print("RSS after creating N sessions, MiB (growth over the baseline; per-session KiB in brackets)")
+    print(f"{'funds':>6} {'sessions':>8} {'per-session':>28} {'shared':>28}")
+    for funds in args.funds:
+        per_session = {}
+        for n in sorted(args.sessions):
+            cells = []
+            for mode in ("per-session", "shared"):
+                projected = per_session.get(mode, 0) * n
+                if projected > args.max_mb * 2**20:
+                    cells.append(f"~ (+{projected / 2**20:7.0f}) [{projected / n / 1024:6.1f}]")
+                    continue
+                out = subprocess.run([sys.executable, "-m", "bench.sessions", "--child", mode, str(n), str(funds)],
+                                     cwd=ROOT, capture_output=True, text=True, check=True)
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                if n > 1:  # 单个会话的增量主要是首次分配，不用来推算
+                    per_session[mode] = r["delta"] / n
+                cells.append(f"{r['rss'] / 2**20:7.1f} (+{r['delta'] / 2**20:7.2f}) [{r['delta'] / n / 1024:6.1f}]")
+            print(f"{funds:>6} {n:>8} {cells[0]:>28} {cells[1]:>28}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""每次 rerun 的迷你图渲染耗时：Plotly 图表 vs 缓存的 SVG
+
+Plotly 一列包含建图和 st.plotly_chart 所做的 JSON 序列化。
+用法: python -m bench.sparkline [--rows 10 100 500]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import charts
+
+
+def make_rows(n):
+    rng = np.random.default_rng(0)
+    rows = []
+    for i in range(n):
+        nav = 1 + rng.random()
+        history = [nav * (1 + np.sin(x / 10) * 0.05 + rng.random() * 0.02) for x in range(50)]
+        rows.append((f"{i:06d}", hash(tuple(history)), history, i % 2 == 0))
+    return rows
+
+
+def plotly_pass(rows):
+    size = 0
+    for _, _, history, is_up in rows:
+        size += len(charts.draw_sparkline(history, is_up).to_json())
+    return size
+
+
+def svg_pass(rows):
+    size = 0
+    for code, version, history, is_up in rows:
+        size += len(charts.sparkline_svg(code, version, history, charts.UP_COLOR if is_up else charts.DOWN_COLOR))
+    return size
+
+
+def timed(fn, rows):
+    t0 = time.perf_counter()
+    size = fn(rows)
+    return (time.perf_counter() - t0) * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    # 预热 plotly 的模板加载
+    charts.draw_sparkline([1, 2], True).to_json()
+    print(f"{'rows':>5} {'plotly_ms':>10} {'plotly_kb':>10} {'svg_cold_ms':>12} {'svg_warm_ms':>12} {'svg_kb':>7}")
+    for n in args.rows:
+        rows = make_rows(n)
+        plotly_ms, plotly_size = timed(plotly_pass, rows)
+        charts._spark_cache.clear()
+        cold_ms, svg_size = timed(svg_pass, rows)
+        warm_ms, _ = timed(svg_pass, rows)
+        print(f"{n:>5} {plotly_ms:>10.1f} {plotly_size / 1024:>10.1f} {cold_ms:>12.2f} {warm_ms:>12.3f} {svg_size / 1024:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
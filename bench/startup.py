@@ -0,0 +1,84 @@
+"""启动开销：进程冷启动、首次运行 / 首次 rerun / 首次打开详情页耗时，以及首次运行期间的导入耗时
+
+每次测量都在新的子进程里进行 (python -X importtime)，取中位数。
+
+用法: python -m bench.startup [--repeat 5] [--top 8]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARK_RUN = "@@first-run"
+MARK_DONE = "@@first-run-done"
+
+CHILD = f"""
+import json, sys, time
+from bench.apptest import start_app
+at, server = start_app()
+print("{MARK_RUN}", file=sys.stderr, flush=True)
+t0 = time.perf_counter()
+at.run()
+t1 = time.perf_counter()
+print("{MARK_DONE}", file=sys.stderr, flush=True)
+heavy = sorted(m for m in ("pandas", "plotly.express") if m in sys.modules)
+at.run()
+t2 = time.perf_counter()
+at.session_state.selected_fund = 0
+at.run()
+t3 = time.perf_counter()
+print(json.dumps({{"first_run_ms": (t1 - t0) * 1000, "first_rerun_ms": (t2 - t1) * 1000,
+                  "open_detail_ms": (t3 - t2) * 1000, "heavy_after_first_run": heavy,
+                  "errors": [e.message for e in at.exception]}}))
+server.shutdown()
+"""
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_once():
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    total = (time.perf_counter() - t0) * 1000
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_ms"] = total
+
+    # 首次运行期间发生的顶层导入 (累计耗时，微秒)
+    err = proc.stderr
+    section = err[err.index(MARK_RUN):err.index(MARK_DONE)]
+    imports = {}
+    for m in IMPORT_LINE.finditer(section):
+        if len(m.group(3)) == 1:
+            imports[m.group(4)] = int(m.group(2))
+    result["first_run_imports"] = imports
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+    print(f"median of {args.repeat} processes")
+    for key in ("process_ms", "first_run_ms", "first_rerun_ms", "open_detail_ms"):
+        print(f"  {key:>15}: {statistics.median(r[key] for r in runs):8.0f}")
+    print(f"  heavy modules loaded by first run: {runs[0]['heavy_after_first_run'] or 'none'}")
+    imports = runs[0]["first_run_imports"]
+    total = sum(imports.values()) / 1000
+    print(f"  imports during first run: {total:.0f}ms")
+    for name, us in sorted(imports.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"    {name:<28} {us / 1000:7.1f}ms")
+    if runs[0]["errors"]:
+        print(f"  errors: {runs[0]['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# ==========================================
+# 本地 fundgz 桩服务器 (Stub Server)
+# 返回与 fundgz.1234567.com.cn/js/<code>.js 相同格式的 jsonpgz(...) 数据
+# ==========================================
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_quote(code):
+    """根据代码生成稳定的模拟行情"""
+    seed = zlib.crc32(code.encode())
+    nav = 0.5 + (seed % 30000) / 10000
+    pct = ((seed >> 8) % 600 - 300) / 100
+    return {
+        "fundcode": code,
+        "name": f"桩基金{code}",
+        "jzrq": datetime.now().strftime("%Y-%m-%d"),
+        "dwjz": f"{nav:.4f}",
+        "gsz": f"{nav * (1 + pct / 100):.4f}",
+        "gszzl": f"{pct:.2f}",
+        "gztime": datetime.now().strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def stub_codes(n):
+    """桩服务器"收录"的前 n 只基金代码"""
+    return [f"{900000 + i:06d}" for i in range(n)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.request_count += 1
+        if srv.latency:
+            time.sleep(srv.latency)
+        code = self.path.rsplit("/", 1)[-1].split(".")[0]
+        with srv.lock:
+            roll = srv.rng.random()
+            stalled = roll < srv.timeout_rate
+            failed = not stalled and roll < srv.timeout_rate + srv.error_rate
+            srv.error_count += stalled or failed
+        if stalled:
+            # 模拟上游无响应：挂起远超客户端超时后再断开
+            time.sleep(srv.stall)
+            self.close_connection = True
+            return
+        if failed:
+            status, body = 502, b"Bad Gateway"
+        else:
+            status = 200
+            body = f"jsonpgz({json.dumps(fake_quote(code), ensure_ascii=False)});".encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/javascript; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency=0.02, host="127.0.0.1", port=0, error_rate=0.0, fund_count=0, seed=0,
+                      timeout_rate=0.0, stall=5.0):
+    """在后台线程启动桩服务器，返回 (server, base_url)
+
+    error_rate 为返回 502 的请求比例，timeout_rate 为挂起 stall 秒不响应的比例；
+    server.codes 为 fund_count 只可用于压测的基金代码 (任意代码都会返回行情，与上游一致)。
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.timeout_rate = timeout_rate
+    server.stall = stall
+    server.codes = stub_codes(fund_count)
+    server.rng = random.Random(seed)
+    server.request_count = 0
+    server.error_count = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
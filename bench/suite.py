@@ -0,0 +1,180 @@
+"""无界面基准套件：用 AppTest 驱动 app.py，行情请求指向本地桩服务器
+
+报告冷启动会话耗时、各视图 rerun 延迟、上游请求数与峰值内存，结果保存为 JSON。
+
+用法: python -m bench.suite [--latency 0.02] [--error-rate 0] [--funds 200] [--runs 10]
+                            [--out bench-results.json] [--baseline old.json]
+"""
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import streamlit
+
+from bench.apptest import measured_run, new_session, start_app
+from quotes import fetch_fund_data_many, quote_cache
+from universe import get_universe
+
+VIEWS = ("PORTFOLIO", "WATCHLIST", "MARKET", "DETAIL")
+
+# 与基线比较时关注的指标 (越小越好)
+TRACKED = ("wall_ms", "p95_ms", "cpu_ms", "bytes", "upstream_requests", "peak_kb")
+
+
+def _traced_peak(fn):
+    """执行 fn，返回 (结果, Python 堆峰值 KB)"""
+    tracemalloc.start()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def session_run(server, at):
+    """会话首次运行：(墙钟毫秒, 上游请求数)"""
+    before = server.request_count
+    t0 = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - t0) * 1000, server.request_count - before
+
+
+def load_funds(at, codes):
+    """把桩服务器收录的基金批量加入共享基金池与本会话的自选"""
+    store = get_universe()
+    watchlist = at.session_state.watchlist
+    quotes = fetch_fund_data_many(codes)
+    for code in codes:
+        data = quotes.get(code)
+        nav = float(data["gsz"]) if data else 1.0
+        pct = float(data["gszzl"]) if data else 0.0
+        row = store.add(code, data["name"] if data else code, "tech", nav, pct, [nav] * 10)
+        watchlist.add(store.ids[row])
+
+
+def bench_view(server, at, view, runs):
+    """切换到视图后重复整页 rerun，统计延迟、字节数、上游请求与峰值内存"""
+    at.session_state.view = view if view != "DETAIL" else "PORTFOLIO"
+    at.session_state.selected_fund = 0 if view == "DETAIL" else None
+    switch = measured_run(at)
+    before = server.request_count
+    samples = [measured_run(at) for _ in range(runs)]
+    upstream = server.request_count - before
+    _, peak_kb = _traced_peak(lambda: measured_run(at))
+    walls = sorted(s[2] for s in samples)
+    return {
+        "switch_ms": round(switch[2], 2),
+        "wall_ms": round(statistics.median(walls), 2),
+        "p95_ms": round(walls[min(len(walls) - 1, int(len(walls) * 0.95))], 2),
+        "cpu_ms": round(statistics.median(s[0] for s in samples), 2),
+        "bytes": int(statistics.median(s[1] for s in samples)),
+        "upstream_requests": upstream,
+        "peak_kb": round(peak_kb, 1),
+        "exceptions": [e.message for e in at.exception],
+    }
+
+
+def compare(results, baseline):
+    """与基线结果逐项比较，打印变化百分比"""
+    print(f"\nvs baseline ({baseline['meta'].get('git', '?')}):")
+    for section in ("cold_session", "warm_session"):
+        _print_delta(section, results[section], baseline.get(section, {}))
+    for view, cur in results["views"].items():
+        _print_delta(view, cur, baseline.get("views", {}).get(view, {}))
+
+
+def _print_delta(name, cur, old):
+    parts = []
+    for key in TRACKED:
+        if key in cur and old.get(key):
+            parts.append(f"{key} {(cur[key] - old[key]) / old[key] * 100:+.0f}%")
+    if parts:
+        print(f"  {name:>12}: " + ", ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.02, help="桩服务器每次响应的延迟 (秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 502 的请求比例")
+    parser.add_argument("--funds", type=int, default=200, help="加入自选的桩基金数量")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--baseline", help="之前保存的结果文件，用于比较")
+    args = parser.parse_args()
+
+    at, server = start_app(latency=args.latency, error_rate=args.error_rate, fund_count=args.funds)
+
+    # 冷启动：进程内第一个会话 (行情缓存、轮询线程、本地存储均为空)
+    cold_ms, cold_requests = session_run(server, at)
+    before = server.request_count
+    t0 = time.perf_counter()
+    load_funds(at, server.codes)
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    results = {
+        "meta": {
+            "git": _git_rev(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "funds": args.funds,
+            "runs": args.runs,
+        },
+        "cold_session": {
+            "wall_ms": round(cold_ms, 2),
+            "upstream_requests": cold_requests,
+            "exceptions": [e.message for e in at.exception],
+        },
+        "load_funds": {"wall_ms": round(load_ms, 2), "upstream_requests": server.request_count - before},
+        "views": {view: bench_view(server, at, view, args.runs) for view in VIEWS},
+    }
+
+    # 第二个会话：共享进程内缓存后的启动开销
+    (warm_ms, warm_requests), peak_kb = _traced_peak(lambda: session_run(server, new_session()))
+    results["warm_session"] = {"wall_ms": round(warm_ms, 2), "upstream_requests": warm_requests,
+                               "peak_kb": round(peak_kb, 1)}
+    results["totals"] = {
+        "upstream_requests": server.request_count,
+        "upstream_errors": server.error_count,
+        "quote_cache": quote_cache.stats(),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    server.shutdown()
+
+    print(f"cold session: {cold_ms:.0f}ms, {cold_requests} upstream requests")
+    print(f"warm session: {warm_ms:.0f}ms, {warm_requests} upstream requests, peak {peak_kb:.0f}KB")
+    print(f"load {args.funds} funds: {load_ms:.0f}ms")
+    print(f"{'view':>10} {'switch':>8} {'median':>8} {'p95':>8} {'cpu':>8} {'bytes':>8} {'reqs':>5} {'peak_kb':>8}")
+    for view, r in results["views"].items():
+        print(f"{view:>10} {r['switch_ms']:>8.1f} {r['wall_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['cpu_ms']:>8.1f}"
+              f" {r['bytes']:>8} {r['upstream_requests']:>5} {r['peak_kb']:>8.0f}")
+        if r["exceptions"]:
+            print(f"{'':>10} exceptions: {r['exceptions']}")
+    print(f"upstream total: {server.request_count} requests, {server.error_count} errors;"
+          f" max RSS {results['totals']['max_rss_kb'] / 1024:.0f}MB")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"saved {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""分时记录：5000 只基金一整个交易日的内存占用、追加耗时与追加期间的内存分配
+
+用法: python -m bench.ticks [--codes 5000]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from ticks import BYTES_PER_CODE, TickRecorder
+
+
+def trading_minutes():
+    """09:30-11:30、13:00-15:00 的每一分钟 (含收盘)"""
+    am = range(9 * 60 + 30, 11 * 60 + 31)
+    pm = range(13 * 60 + 1, 15 * 60 + 1)
+    return [f"2024-05-20 {m // 60:02d}:{m % 60:02d}" for m in (*am, *pm)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=5000)
+    args = parser.parse_args()
+
+    codes = [f"{i:06d}" for i in range(args.codes)]
+    rec = TickRecorder(capacity=args.codes)
+    rng = np.random.default_rng(0)
+    navs = (1 + rng.normal(0, 0.001, (len(trading_minutes()), args.codes)).cumsum(axis=0)).tolist()
+
+    # 首笔：登记所有代码 (不计入追加统计)
+    times = trading_minutes()
+    for code, nav in zip(codes, navs[0]):
+        rec.record(code, times[0], nav)
+
+    t0 = time.perf_counter()
+    n = 0
+    for gztime, row in zip(times[1:], navs[1:]):
+        for code, nav in zip(codes, row):
+            rec.record(code, gztime, nav)
+            n += 1
+    elapsed = time.perf_counter() - t0
+
+    # 第二天：开盘清空后再记录一整天，统计追加过程中保留下来的内存
+    next_day = [t.replace("2024-05-20", "2024-05-21") for t in times]
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for gztime, row in zip(next_day, navs):
+        for code, nav in zip(codes, row):
+            rec.record(code, gztime, nav)
+    retained = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for code in codes:
+        rec.series(code)
+    read_us = (time.perf_counter() - t0) / len(codes) * 1e6
+
+    print(f"codes={args.codes} ticks/code={len(times)} appends={n}")
+    print(f"buffer: {rec.nbytes / 2**20:.1f} MiB total, {BYTES_PER_CODE} B per code")
+    print(f"append: {elapsed / n * 1e6:.2f} us each ({elapsed * 1000:.0f}ms per full day)")
+    print(f"memory retained by a full day of appends: {retained / 1024:.0f} KiB (version counters, gztime parse cache)")
+    print(f"read one day: {read_us:.2f} us per code")
+
+
+if __name__ == "__main__":
+    main()
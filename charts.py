@@ -0,0 +1,260 @@
+# ==========================================
+# 图表组件 (Charts)
+# ==========================================
+import base64
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import timed
+from navstore import nav_store
+from ticks import tick_recorder, minute_labels
+
+UP_COLOR = '#ef4444'
+DOWN_COLOR = '#22c55e'
+
+# 迷你图尺寸 (像素) 与缓存条目上限
+SPARK_WIDTH = 120
+SPARK_HEIGHT = 40
+SPARK_CACHE_SIZE = 4096
+
+# 详情页图表：区间 -> (数据来源, 预聚合粒度)。1D 读分时记录，其余读历史净值库
+CHART_RANGES = {
+    "1D": ("intraday", None),
+    "1M": ("30D", None),
+    "1Y": ("1Y", None),
+    "3Y": ("3Y", "W"),
+    "All": ("ALL", "M"),
+}
+# 下采样目标点数 (约等于图表的像素宽度) 与图表缓存条目上限
+CHART_POINTS = 400
+FIGURE_CACHE_SIZE = 256
+LINE_COLOR = '#0f172a'
+
+_spark_cache = OrderedDict()  # (code, 历史版本, 颜色) -> data URI
+_spark_lock = threading.Lock()
+_figure_cache = OrderedDict()  # (code, 区间, 数据版本, 颜色) -> Figure
+_figure_lock = threading.Lock()
+
+
+@timed("chart.sparkline_plotly")
+def draw_sparkline(data, is_positive):
+    import pandas as pd
+    import plotly.express as px
+
+    color = UP_COLOR if is_positive else DOWN_COLOR
+    df = pd.DataFrame({'val': data, 'idx': range(len(data))})
+    fig = px.area(df, x='idx', y='val', height=40)
+    fig.update_traces(line_color=color, fillcolor=color, opacity=0.1)
+    fig.update_layout(
+        showlegend=False,
+        xaxis_visible=False,
+        yaxis_visible=False,
+        margin=dict(l=0, r=0, t=0, b=0),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+@timed("chart.sparkline_svg")
+def render_sparkline_svg(data, color, width=SPARK_WIDTH, height=SPARK_HEIGHT):
+    """把历史序列直接画成 SVG (折线 + 半透明填充)"""
+    vals = np.asarray(data, dtype=float)
+    if vals.size == 0:
+        vals = np.zeros(2)
+    elif vals.size == 1:
+        vals = np.repeat(vals, 2)
+    lo, hi = vals.min(), vals.max()
+    span = hi - lo if hi > lo else 1.0
+    xs = np.linspace(0, width, vals.size)
+    # 上下各留 1px，避免线条被裁掉
+    ys = (height - 1) - (vals - lo) / span * (height - 2)
+    line = " ".join(f"{x:.1f},{y:.1f}" for x, y in zip(xs, ys))
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" preserveAspectRatio="none">'
+        f'<polygon points="0,{height} {line} {width},{height}" fill="{color}" fill-opacity="0.1"/>'
+        f'<polyline points="{line}" fill="none" stroke="{color}" stroke-width="1.5" vector-effect="non-scaling-stroke"/>'
+        f'</svg>'
+    )
+
+
+def sparkline_svg(code, version, data, color):
+    """返回迷你图的 data URI，按 (code, 历史版本, 颜色) 进程内缓存"""
+    key = (code, version, color)
+    with _spark_lock:
+        uri = _spark_cache.get(key)
+        if uri is not None:
+            _spark_cache.move_to_end(key)
+            return uri
+    svg = render_sparkline_svg(data, color)
+    uri = "data:image/svg+xml;base64," + base64.b64encode(svg.encode()).decode()
+    with _spark_lock:
+        _spark_cache[key] = uri
+        while len(_spark_cache) > SPARK_CACHE_SIZE:
+            _spark_cache.popitem(last=False)
+    return uri
+
+
+
+def lttb(x, y, n):
+    """Largest-Triangle-Three-Buckets 下采样到 n 个点，返回保留点的下标 (保留首尾与形状特征)"""
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # 首尾之外的点均分成 n - 2 个桶，每个桶选出与"上一个选中点、下一个桶均值"围成面积最大的点
+    edges = np.linspace(1, size - 1, n - 1).astype(np.intp)
+    out = np.empty(n, dtype=np.intp)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < n - 1:
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def aggregate(dates, navs, freq):
+    """按周 (W) / 月 (M) 取每期最后一个净值，全程向量化"""
+    if freq == "W":
+        # 1970-01-01 是周四，+3 后按 7 天整除即以周一为一周的开始
+        keys = (dates.astype(np.int64) + 3) // 7
+    else:
+        keys = dates.astype("datetime64[M]").astype(np.int64)
+    last = np.append(np.flatnonzero(keys[1:] != keys[:-1]), len(keys) - 1)
+    return dates[last], navs[last]
+
+
+def chart_series(code, period, points=CHART_POINTS):
+    """区间对应的 (x, y, 数据版本)；已按粒度聚合并下采样到不超过 points 个点"""
+    source, freq = CHART_RANGES[period]
+    if source == "intraday":
+        minutes, values = tick_recorder.series(code)
+        keep = lttb(np.arange(len(values)), values, points)
+        return minute_labels(minutes[keep]), values[keep], tick_recorder.version(code)
+    dates, navs = nav_store.range(code, source)
+    if freq and len(dates):
+        dates, navs = aggregate(dates, navs, freq)
+    keep = lttb(dates.astype(np.int64), navs, points)
+    return dates[keep], navs[keep], nav_store.version(code)
+
+
+def chart_figure(code, period, color=LINE_COLOR):
+    """区间走势图，按 (code, 区间, 数据版本, 颜色) 进程内缓存；少于 2 个点返回 None
+
+    缓存的 Figure 在会话之间共享，调用方不要修改它。
+    """
+    import plotly.graph_objects as go
+
+    source = CHART_RANGES[period][0]
+    version = tick_recorder.version(code) if source == "intraday" else nav_store.version(code)
+    key = (code, period, version, color)
+    with _figure_lock:
+        fig = _figure_cache.get(key)
+        if fig is not None:
+            _figure_cache.move_to_end(key)
+            return fig
+    x, y, _ = chart_series(code, period)
+    if len(y) < 2:
+        return None
+    fig = go.Figure(go.Scatter(x=x, y=y, mode="lines", line=dict(color=color, width=1.5),
+                               hovertemplate="%{x}<br>%{y:.4f}<extra></extra>"))
+    fig.update_layout(
+        height=200,
+        margin=dict(l=0, r=0, t=10, b=20),
+        # 分时用类别轴，午休不留空白
+        xaxis=dict(showgrid=False, nticks=5, type="category" if source == "intraday" else None),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9'),
+        plot_bgcolor='white',
+        # 前端会套用 Streamlit 主题，不必再随图发送 plotly 默认模板 (约 6 KB)
+        template="none",
+    )
+    with _figure_lock:
+        _figure_cache[key] = fig
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return fig
+
+
+def correlation_figure(win, labels):
+    """相关系数热力图 (win 为 risk.ReturnWindow，labels 与 win.codes 对齐)，按窗口版本进程内缓存"""
+    import plotly.graph_objects as go
+
+    key = ("corr", tuple(win.codes), win.window, win.version, tuple(labels))
+    with _figure_lock:
+        fig = _figure_cache.get(key)
+        if fig is not None:
+            _figure_cache.move_to_end(key)
+            return fig
+    fig = go.Figure(go.Heatmap(
+        z=np.round(win.correlation(), 2), x=labels, y=labels, zmin=-1, zmax=1,
+        colorscale=[[0, DOWN_COLOR], [0.5, "#ffffff"], [1, UP_COLOR]],
+        hovertemplate="%{y} / %{x}<br>%{z}<extra></extra>"))
+    fig.update_layout(
+        height=max(200, 24 * len(labels) + 60),
+        margin=dict(l=0, r=0, t=10, b=0),
+        yaxis=dict(autorange="reversed"),
+        template="none",
+    )
+    with _figure_lock:
+        _figure_cache[key] = fig
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return fig
+
+
+def dca_distribution_figure(results, labels):
+    """定投回测 IRR 分布：单只基金为直方图，多只为箱线图 (分位数在服务端算好，不随图发送每个起投日)"""
+    import plotly.graph_objects as go
+
+    pairs = [(label, r["irr"] * 100) for label, r in zip(labels, results) if r is not None]
+    if not pairs:
+        return None
+    if len(pairs) == 1:
+        irr = pairs[0][1]
+        counts, edges = np.histogram(irr, bins=min(40, max(5, len(irr) // 20)))
+        centers = (edges[:-1] + edges[1:]) / 2
+        fig = go.Figure(go.Bar(
+            x=np.round(centers, 2), y=counts, width=np.diff(edges),
+            marker_color=[UP_COLOR if c >= 0 else DOWN_COLOR for c in centers],
+            hovertemplate="IRR %{x:.1f}%<br>%{y} 个起投日<extra></extra>"))
+        fig.add_vline(x=float(np.median(irr)), line_dash="dash", line_color=LINE_COLOR)
+        fig.update_layout(xaxis=dict(title="年化 IRR (%)"), yaxis=dict(title="起投日数", gridcolor='#f1f5f9'))
+    else:
+        fig = go.Figure()
+        for label, irr in pairs:
+            q1, median, q3 = np.percentile(irr, [25, 50, 75])
+            low, high = np.percentile(irr, [5, 95])
+            fig.add_trace(go.Box(name=label, q1=[q1], median=[median], q3=[q3],
+                                 lowerfence=[low], upperfence=[high], marker_color=LINE_COLOR))
+        fig.update_layout(showlegend=False, yaxis=dict(title="年化 IRR (%, 5%~95%)", gridcolor='#f1f5f9'))
+    fig.update_layout(height=260, margin=dict(l=0, r=0, t=10, b=20), plot_bgcolor='white', template="none")
+    return fig
+
+
+def dca_path_figure(dates, invested, value):
+    """单个起投日的定投路径：累计投入与市值"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure([
+        go.Scatter(x=dates, y=invested, mode="lines", name="累计投入", line=dict(color="#94a3b8", width=1)),
+        go.Scatter(x=dates, y=value, mode="lines", name="市值", line=dict(color=LINE_COLOR, width=1.5)),
+    ])
+    fig.update_layout(
+        height=200,
+        margin=dict(l=0, r=0, t=10, b=20),
+        legend=dict(orientation="h", y=1.1),
+        yaxis=dict(showgrid=True, gridcolor='#f1f5f9'),
+        plot_bgcolor='white',
+        template="none",
+    )
+    return fig
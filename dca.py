@@ -0,0 +1,190 @@
+# ==========================================
+# 定投回测 (DCA Backtest)
+# 每隔 every 个交易日投入固定金额、持有 horizon 个交易日，对每一个可能的起投日同时计算：
+# 期末市值、内部收益率 (IRR) 与持有期内的最大回撤。
+# 份额按步长 every 的分组前缀和 (步长累加) 得到，任一起投日的累计份额只是两次下标取值之差；
+# IRR 利用定投现金流等额等间隔，解析求和后对全部起投日同时做牛顿迭代。
+# 多只基金可选用进程池并行 (GUGU_DCA_WORKERS)。
+# ==========================================
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from navstore import nav_store
+
+TRADING_DAYS = 252
+
+# 定投频率 -> 间隔交易日
+DCA_FREQS = {"每日": 1, "每周": 5, "每两周": 10, "每月": 21}
+
+# 持有期 -> 交易日数
+DCA_HORIZONS = {"1Y": 252, "3Y": 756, "5Y": 1260}
+
+# 回撤按起投日分块计算，每块 (块大小 × 持有期) 个浮点数
+DCA_CHUNK = 64
+
+DCA_WORKERS = int(os.environ.get("GUGU_DCA_WORKERS", "1"))
+DCA_CACHE_SIZE = 32
+
+_IRR_STEPS = 30
+
+_pool = None
+_pool_lock = threading.Lock()
+_cache = OrderedDict()  # (代码, 区间, 频率, 持有期, 金额, 数据版本) -> 结果列表
+_cache_lock = threading.Lock()
+
+
+def _strided_cumsum(values, every):
+    """out[t] = values[t] + values[t - every] + values[t - 2*every] + ..."""
+    n = len(values)
+    padded = np.zeros(-(-n // every) * every)
+    padded[:n] = values
+    return padded.reshape(-1, every).cumsum(axis=0).ravel()[:n]
+
+
+def _log_expm1_ratio(z):
+    """log(expm1(z) / z)，z = 0 处取极限 0"""
+    small = np.abs(z) < 1e-8
+    safe = np.where(small, 1.0, z)
+    return np.where(small, z / 2, np.log(np.expm1(safe) / safe))
+
+
+def _log_expm1_ratio_slope(z):
+    """上式的导数 e^z / expm1(z) - 1/z，z = 0 处取极限 1/2"""
+    small = np.abs(z) < 1e-6
+    safe = np.where(small, 1.0, z)
+    return np.where(small, 0.5 + z / 12, np.exp(safe) / np.expm1(safe) - 1 / safe)
+
+
+def dca_irr(count, every, horizon, multiple):
+    """定投年化 IRR (向量化)
+
+    第 0, every, ..., (count-1)*every 个交易日各投入 1 元，第 horizon 个交易日市值为 multiple 元。
+    记日收益率对数为 y，终值方程 Σ e^{y(horizon - j·every)} = multiple 取对数后为
+        y·a + log(count) + L(count·every·y) - L(every·y) = log(multiple)，a = horizon - (count-1)·every
+    其中 L(z) = log(expm1(z)/z)。左边关于 y 单调且凸，牛顿法从线性近似起步即可收敛。
+    """
+    multiple = np.asarray(multiple, dtype=float)
+    a = horizon - (count - 1) * every
+    target = np.log(multiple) - np.log(count)
+    mean_span = a + (count - 1) * every / 2
+    y = target / mean_span
+    for _ in range(_IRR_STEPS):
+        f = y * a + _log_expm1_ratio(count * every * y) - _log_expm1_ratio(every * y) - target
+        slope = a + count * every * _log_expm1_ratio_slope(count * every * y) \
+            - every * _log_expm1_ratio_slope(every * y)
+        step = f / slope
+        y = np.clip(y - step, -0.05, 0.05)
+        if np.all(np.abs(step) < 1e-12):
+            break
+    return np.expm1(y * TRADING_DAYS)
+
+
+def simulate(navs, every, horizon, amount=1000.0, chunk=DCA_CHUNK):
+    """单只基金在每个起投日的定投结果；历史不足一个持有期返回 None
+
+    返回 dict：start (起投日下标)、invested (累计投入)、final (期末市值)、
+    irr (年化)、max_drawdown (持有期内 市值/投入 的最大回撤，0~1)。
+    """
+    navs = np.asarray(navs, dtype=float)
+    starts = np.arange(len(navs) - horizon)
+    if not len(starts):
+        return None
+    count = (horizon - 1) // every + 1  # 第 horizon 天估值，当天不再投入
+    units = _strided_cumsum(1.0 / navs, every)
+    # 起投日之前同一步长上的累计份额 (起投日前不足一个步长的为 0)
+    before = np.where(starts >= every, units[np.maximum(starts - every, 0)], 0.0)
+    final_units = units[starts + (count - 1) * every] - before
+    multiple = final_units * navs[starts + horizon]
+
+    # 持有期按投入间隔分成 blocks 段，第 j 段内份额不变 (已投入 min(j+1, count) 次)：
+    # 每段只取一次 份额/投入次数，净值用 (段, 段内第几天, 起投日) 的跨步视图，不逐日取下标。
+    # 中间数组按 (天, 起投日) 排列，沿天数的累计最大值按行连续计算
+    blocks = horizon // every + 1
+    paid = np.minimum(np.arange(blocks), count - 1)
+    padded = np.concatenate([navs, np.ones(every)])  # 最后一段超出持有期的几天，裁掉前用 1 填充
+    step = padded.strides[0]
+    window = np.lib.stride_tricks.as_strided(
+        padded, shape=(blocks, every, len(starts)), strides=(every * step, step, step), writeable=False)
+    drawdown = np.empty(len(starts))
+    for lo in range(0, len(starts), chunk):
+        hi = min(lo + chunk, len(starts))
+        per_paid = (units[starts[lo:hi] + (paid * every)[:, None]] - before[lo:hi]) / (paid + 1)[:, None]
+        ratio = (window[:, :, lo:hi] * per_paid[:, None, :]).reshape(blocks * every, hi - lo)[:horizon + 1]
+        peak = np.maximum.accumulate(ratio, axis=0)
+        np.divide(ratio, peak, out=peak)
+        drawdown[lo:hi] = 1 - peak.min(axis=0)
+
+    return {
+        "start": starts,
+        "invested": amount * count,
+        "final": amount * multiple,
+        "irr": dca_irr(count, every, horizon, multiple),
+        "max_drawdown": drawdown,
+    }
+
+
+def value_path(navs, start, every, horizon, amount=1000.0):
+    """某个起投日的逐日 (累计投入, 市值)，用于画单条路径"""
+    navs = np.asarray(navs, dtype=float)[start:start + horizon + 1]
+    days = np.arange(len(navs))
+    buy = (days % every == 0) & (days < horizon)
+    invested = amount * np.cumsum(buy)
+    value = np.cumsum(np.where(buy, amount / navs, 0.0)) * navs
+    return invested, value
+
+
+def _simulate_many(args):
+    """进程池任务：一批基金依次回测"""
+    histories, every, horizon, amount = args
+    return [simulate(navs, every, horizon, amount) for navs in histories]
+
+
+def _get_pool(workers):
+    global _pool
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    with _pool_lock:
+        if _pool is None:
+            # spawn：不继承 Streamlit 进程里的线程与锁
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def backtest(histories, every, horizon, amount=1000.0, workers=None):
+    """多只基金的净值序列列表 -> 与之对齐的 simulate 结果列表；workers > 1 时按基金分批交给进程池"""
+    workers = DCA_WORKERS if workers is None else workers
+    histories = [np.asarray(navs, dtype=float) for navs in histories]
+    if workers <= 1 or len(histories) < 2:
+        return _simulate_many((histories, every, horizon, amount))
+    batches = [histories[i::workers] for i in range(workers)]
+    results = list(_get_pool(workers).map(_simulate_many, [(b, every, horizon, amount) for b in batches]))
+    # 交错分批 (历史长短不一时各进程负载更均匀)，再按原顺序放回
+    out = [None] * len(histories)
+    for i, batch in enumerate(results):
+        out[i::workers] = batch
+    return out
+
+
+def backtest_codes(codes, every, horizon, amount=1000.0, start=None, end=None, store=nav_store, workers=None):
+    """从净值库读取 [start, end] 区间的历史并回测，结果附带起投日期 (dates)；按数据版本进程内缓存"""
+    codes = list(codes)
+    key = (tuple(codes), start, end, every, horizon, amount, tuple(store.version(code) for code in codes))
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    windows = [store.read(code, start=start, end=end) for code in codes]
+    results = backtest([navs for _, navs in windows], every, horizon, amount, workers)
+    for (dates, _), result in zip(windows, results):
+        if result is not None:
+            result["dates"] = np.asarray(dates)[result["start"]]
+    with _cache_lock:
+        _cache[key] = results
+        while len(_cache) > DCA_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return results
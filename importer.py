@@ -0,0 +1,398 @@
+# ==========================================
+# 对账单批量导入 (Statement Import)
+# 券商 / 代销平台导出的 CSV、XLSX 交易记录按块流式解析：每块 IMPORT_CHUNK 行，
+# 列名按模板映射到 代码 / 日期 / 方向 / 金额 / 净值 (或份额)，整块向量化校验。
+# 基金代码须在本地基金池或全市场基金列表中；格式错误的行记入报告，不中断导入。
+# 通过校验的行压成紧凑的记录块 (每行 33 字节)，块内按日期排序后直接记入交易流水并落盘
+# (每批一个事务)，内存只与块大小有关，不随文件行数增长。
+# 按时间倒序导出的对账单 (最新在前) 先把记录块写入临时文件，读完后逆序取回再记入。
+#
+# 模板可在 data/import_templates.json (GUGU_IMPORT_TEMPLATES) 中追加或覆盖，格式同 IMPORT_TEMPLATES：
+#   {"我的券商": {"columns": {"code": "证券代码", "date": "成交日期", "side": "操作",
+#                             "amount": "成交金额", "nav": "成交价格"},
+#                 "sides": {"买入": "buy", "卖出": "sell"}}}
+# ==========================================
+import codecs
+import csv
+import io
+import json
+import os
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+from ledger import BUY, SELL
+
+IMPORT_CHUNK = 20_000  # 每块解析的行数
+IMPORT_BATCH = 20_000  # 每批记入流水并落盘的交易数
+REPORT_LIMIT = 1000    # 报告中保留的错误明细条数 (计数不受限)
+
+TEMPLATES_PATH = os.environ.get("GUGU_IMPORT_TEMPLATES", os.path.join("data", "import_templates.json"))
+
+# 必填字段；nav 与 shares 至少有一列 (只有份额时净值 = 金额 / 份额)
+REQUIRED_FIELDS = ("code", "date", "side", "amount")
+
+IMPORT_TEMPLATES = {
+    "通用": {
+        "columns": {"code": "code", "date": "date", "side": "side", "amount": "amount", "nav": "nav"},
+        "sides": {"buy": "buy", "sell": "sell", "买入": "buy", "卖出": "sell"},
+    },
+    "天天基金": {
+        "columns": {"code": "基金代码", "date": "确认日期", "side": "业务类型",
+                    "amount": "确认金额", "nav": "确认净值", "shares": "确认份额"},
+        "sides": {"申购": "buy", "认购": "buy", "定投": "buy", "买入": "buy",
+                  "赎回": "sell", "卖出": "sell"},
+    },
+    "支付宝": {
+        "columns": {"code": "基金代码", "date": "交易日期", "side": "交易类型",
+                    "amount": "交易金额", "nav": "成交净值"},
+        "sides": {"买入": "buy", "定投": "buy", "卖出": "sell"},
+    },
+}
+
+_SIDE_VALUES = {"buy": BUY, "sell": SELL}
+
+# 报告里的错误原因
+ERR_COLUMNS = "列数不足"
+ERR_CODE = "未知基金代码"
+ERR_DATE = "日期无法解析"
+ERR_SIDE = "无法识别的交易方向"
+ERR_NUMBER = "金额 / 净值无效"
+ERR_SELL = "持仓不足"
+
+
+def load_templates(path=TEMPLATES_PATH):
+    """内置模板 + 配置文件中的模板 (同名覆盖)；方向值统一成 BUY / SELL"""
+    templates = dict(IMPORT_TEMPLATES)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            templates.update(json.load(f))
+    return {
+        name: {"columns": t["columns"],
+               "sides": {str(k).strip(): _SIDE_VALUES[str(v).lower()] for k, v in t["sides"].items()}}
+        for name, t in templates.items()
+    }
+
+
+def detect_template(header, templates):
+    """表头包含全部必填列 (及净值或份额列) 的第一个模板名；都不匹配返回 None"""
+    header = set(header)
+    for name, t in templates.items():
+        cols = t["columns"]
+        if all(cols.get(f) in header for f in REQUIRED_FIELDS) and (
+                cols.get("nav") in header or cols.get("shares") in header):
+            return name
+    return None
+
+
+def _text_stream(raw):
+    """二进制上传 -> 文本流；UTF-8 (含 BOM) 解码失败时按 GBK (国内券商导出常见)"""
+    head = raw.read(1 << 16)
+    raw.seek(0)
+    try:
+        codecs.getincrementaldecoder("utf-8-sig")().decode(head, final=False)
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        encoding = "gbk"
+    return io.TextIOWrapper(raw, encoding=encoding, errors="replace", newline="")
+
+
+def _size_of(raw):
+    pos = raw.tell()
+    size = raw.seek(0, io.SEEK_END)
+    raw.seek(pos)
+    return size or 1
+
+
+def _csv_chunks(raw, chunk):
+    """CSV 按块读出：(表头, 生成器[(起始行号, 行列表, 进度 0~1)])"""
+    size = _size_of(raw)
+    reader = csv.reader(_text_stream(raw))
+    header = [h.strip() for h in next(reader, [])]
+
+    def chunks():
+        line = 2
+        while True:
+            rows = [r for _, r in zip(range(chunk), reader)]
+            if not rows:
+                return
+            yield line, rows, min(raw.tell() / size, 1.0)
+            line += len(rows)
+    return header, chunks()
+
+
+def _cell_text(value):
+    """XLSX 单元格 -> 与 CSV 一致的文本 (整数型的浮点去掉 .0，日期取 YYYY-MM-DD)"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def _xlsx_chunks(raw, chunk):
+    """XLSX 第一个工作表按块读出 (openpyxl 只读模式逐行迭代，不把整个表读入内存)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("导入 XLSX 需要安装 openpyxl (pip install openpyxl)")
+    sheet = load_workbook(raw, read_only=True, data_only=True).worksheets[0]
+    total = sheet.max_row or 1
+    rows_iter = sheet.iter_rows(values_only=True)
+    header = [_cell_text(h).strip() for h in next(rows_iter, ())]
+
+    def chunks():
+        line = 2
+        while True:
+            rows = [[_cell_text(v) for v in r] for _, r in zip(range(chunk), rows_iter)]
+            if not rows:
+                return
+            line += len(rows)
+            yield line - len(rows), rows, min((line - 1) / total, 1.0)
+    return header, chunks()
+
+
+# 对账单里常见的日期写法，依次尝试 (每种格式整列解析一次)
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y%m%d", "%Y.%m.%d")
+
+
+def _numbers(values):
+    """文本列 -> 浮点数组 (去掉千分位与货币符号；无法解析为 NaN)"""
+    import pandas as pd
+
+    s = pd.Series(values, dtype=object)
+    out = np.array(pd.to_numeric(s, errors="coerce"), dtype=float)
+    retry = np.isnan(out)
+    if retry.any():
+        cleaned = s[retry].str.replace(",", "", regex=False)
+        out[retry] = pd.to_numeric(cleaned, errors="coerce")
+        retry = np.isnan(out) & (s.str.strip() != "").to_numpy()
+        if retry.any():
+            # 只对剩下的少数行做正则清洗
+            cleaned = s[retry].str.replace(r"[,\s¥￥元]", "", regex=True)
+            out[retry] = pd.to_numeric(cleaned, errors="coerce")
+    return out
+
+
+def _dates(values):
+    """按 DATE_FORMATS 解析日期 (只取前 10 个字符，忽略时间) -> datetime64[D]，无法解析为 NaT"""
+    import pandas as pd
+
+    s = pd.Series(values, dtype=object).str.strip().str.slice(0, 10)
+    out = np.full(len(s), np.datetime64("NaT"), dtype="datetime64[D]")
+    retry = np.ones(len(s), dtype=bool)
+    for fmt in DATE_FORMATS:
+        parsed = pd.to_datetime(s[retry], format=fmt, errors="coerce").to_numpy().astype("datetime64[D]")
+        out[retry] = parsed
+        retry[retry] = np.isnat(parsed)
+        if not retry.any():
+            break
+    return out
+
+
+def normalize_code(text):
+    """'1234' / '001234.OF' / ' 001234 ' -> '001234'"""
+    code = text.strip().split(".")[0]
+    return code.zfill(6) if code.isdigit() else code
+
+
+class ImportReport:
+    """导入结果：计数、按原因汇总的错误与前 REPORT_LIMIT 条明细 (行号, 原始代码, 原因)"""
+
+    def __init__(self, template):
+        self.template = template
+        self.total = 0
+        self.imported = 0
+        self.errors = Counter()
+        self.details = []
+        self.rows = set()  # 有交易记入的基金行号
+
+    def add_error(self, line, code, reason):
+        self.errors[reason] += 1
+        if len(self.details) < REPORT_LIMIT:
+            self.details.append((int(line), code, reason))
+
+    @property
+    def failed(self):
+        return sum(self.errors.values())
+
+    def to_csv(self):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(["line", "code", "reason"])
+        writer.writerows(self.details)
+        return out.getvalue()
+
+
+# 通过校验的一行 (紧凑记录，无对齐填充)
+STAGED = np.dtype([("line", "<i4"), ("row", "<i4"), ("side", "i1"), ("amount", "<f8"), ("nav", "<f8"),
+                   ("date", "<M8[D]")])
+
+
+class _Spool:
+    """记录块暂存到临时文件，之后按块顺序或逆序取回 (内存里只有一块)"""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._sizes = []
+
+    def __len__(self):
+        return sum(self._sizes)
+
+    def add(self, block):
+        block.tofile(self._file)
+        self._sizes.append(len(block))
+
+    def blocks(self, reverse=False):
+        offsets = np.r_[0, np.cumsum(self._sizes)] * STAGED.itemsize
+        order = range(len(self._sizes) - 1, -1, -1) if reverse else range(len(self._sizes))
+        for i in order:
+            self._file.seek(int(offsets[i]))
+            yield np.fromfile(self._file, dtype=STAGED, count=self._sizes[i])
+
+    def close(self):
+        self._file.close()
+
+
+def _validate(rows, first_line, columns, sides, resolve, report):
+    """一块原始行 -> 合格行的记录块 (STAGED)，不合格的记入报告"""
+    width = max(columns.values()) + 1
+    lines = np.arange(first_line, first_line + len(rows))
+    filled = np.array([any(r) for r in rows], dtype=bool)  # 空行 (含只有分隔符的行) 直接跳过
+    short = np.array([len(r) < width for r in rows], dtype=bool) & filled
+    for i in np.flatnonzero(short):
+        report.add_error(lines[i], rows[i][columns["code"]] if len(rows[i]) > columns["code"] else "", ERR_COLUMNS)
+    report.total += int(filled.sum())
+    keep = filled & ~short
+    rows = [r for r, k in zip(rows, keep) if k]
+    lines = lines[keep]
+    if not rows:
+        return np.zeros(0, dtype=STAGED)
+
+    raw_codes = [r[columns["code"]] for r in rows]
+    fund_rows = np.array([resolve(c) for c in raw_codes], dtype=np.int64)
+    dates = _dates([r[columns["date"]] for r in rows])
+    side = np.array([sides.get(r[columns["side"]].strip(), 0) for r in rows], dtype=np.int8)
+    amount = _numbers([r[columns["amount"]] for r in rows])
+    if "nav" in columns:
+        nav = _numbers([r[columns["nav"]] for r in rows])
+    else:
+        nav = np.full(len(rows), np.nan)
+    if "shares" in columns:
+        # 没有净值列或净值为空时按 金额 / 份额 折算
+        shares = _numbers([r[columns["shares"]] for r in rows])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            nav = np.where(np.isnan(nav), amount / shares, nav)
+
+    checks = (
+        (fund_rows < 0, ERR_CODE),
+        (np.isnat(dates), ERR_DATE),
+        (side == 0, ERR_SIDE),
+        (~((amount > 0) & (nav > 0) & np.isfinite(nav)), ERR_NUMBER),
+    )
+    bad = np.zeros(len(rows), dtype=bool)
+    for mask, reason in checks:
+        for i in np.flatnonzero(mask & ~bad):
+            report.add_error(lines[i], raw_codes[i], reason)
+        bad |= mask
+    ok = ~bad
+    block = np.empty(int(ok.sum()), dtype=STAGED)
+    block["line"], block["row"], block["side"] = lines[ok], fund_rows[ok], side[ok]
+    block["amount"], block["nav"], block["date"] = amount[ok], nav[ok], dates[ok]
+    return block
+
+
+def _record(block, ledger, store, user_store, report, batch):
+    """一个记录块按日期稳定排序后分批记入流水；每批涉及的交易与持仓一个事务落盘"""
+    block = block[np.argsort(block["date"], kind="stable")]
+    codes = store.codes  # 基金池只追加行，行号始终有效
+    for lo in range(0, len(block), batch):
+        part = block[lo:lo + batch]
+        line, rows, side, amount, nav, date = (part[k] for k in STAGED.names)
+        shares, errors = ledger.extend(rows, side, amount, nav, date)
+        ok = np.ones(len(part), dtype=bool)
+        for i, message in errors:
+            ok[i] = False
+            report.add_error(line[i], codes[rows[i]], ERR_SELL if message.startswith(ERR_SELL) else message)
+        touched = set(rows[ok].tolist())
+        report.imported += len(shares)
+        report.rows |= touched
+        if user_store is not None and len(shares):
+            trades = list(zip([codes[r] for r in rows[ok].tolist()], side[ok].tolist(), amount[ok].tolist(),
+                              nav[ok].tolist(), shares.tolist(), date[ok].astype(str).tolist()))
+            user_store.trades_imported(
+                [(codes[r], store.names[r], store.sector_ids[r]) for r in touched],
+                trades,
+                [(codes[r], *ledger.position_of(r)) for r in touched])
+
+
+def import_statement(file, filename, ledger, store, fund_index, user_store=None, template=None,
+                     on_progress=None, chunk=IMPORT_CHUNK, batch=IMPORT_BATCH):
+    """解析对账单并记入 ledger (及 user_store)，返回 ImportReport
+
+    store 为共享基金池：代码在全市场列表中但不在基金池里的先以占位行情加入 (与恢复会话一致)。
+    template 为模板名，None 时按表头自动识别；无匹配模板时抛出 ValueError。
+    on_progress(进度 0~1, 说明) 在每块处理后调用。
+    """
+    templates = load_templates()
+    reader = _xlsx_chunks if filename.lower().endswith((".xlsx", ".xlsm")) else _csv_chunks
+    header, chunks = reader(file, chunk)
+    template = template or detect_template(header, templates)
+    if template is None:
+        raise ValueError(f"无法识别表头，请选择模板: {'、'.join(header[:8])}")
+    spec = templates[template]
+    missing = [name for f, name in spec["columns"].items() if name not in header and f in REQUIRED_FIELDS]
+    if missing:
+        raise ValueError(f"模板「{template}」缺少列: {'、'.join(missing)}")
+    columns = {f: header.index(name) for f, name in spec["columns"].items() if name in header}
+
+    resolved = {}  # 原始代码文本 -> 行号 (-1 为未知代码)；对账单里同一基金反复出现
+
+    def resolve(text):
+        row = resolved.get(text)
+        if row is None:
+            code = normalize_code(text)
+            row = store.index_of_code(code)
+            if row is None:
+                entry = fund_index.get(code)
+                row = -1 if entry is None else store.add(code, entry[1], "all", 1.0, 0.0, [1.0])
+            resolved[text] = row
+        return row
+
+    report = ImportReport(template)
+    # 文件的时间方向由前两个不同的日期决定；确定之前的记录块先暂存
+    spool, descending, first_date = _Spool(), None, None
+    try:
+        for first_line, rows, progress in chunks:
+            block = _validate(rows, first_line, columns, spec["sides"], resolve, report)
+            if descending is None and len(block):
+                first_date = block["date"][0] if first_date is None else first_date
+                later = block["date"][block["date"] != first_date]
+                if len(later):
+                    descending = bool(later[0] < first_date)
+                    if not descending:
+                        for held in spool.blocks():
+                            _record(held, ledger, store, user_store, report, batch)
+                        spool.close()
+                        spool = _Spool()
+            if descending is False:
+                _record(block, ledger, store, user_store, report, batch)
+            elif len(block):
+                spool.add(block)
+            if on_progress:
+                share = 1.0 if descending is False else 0.5  # 暂存的部分还要再记入一遍
+                on_progress(share * progress, f"已处理 {report.total:,} 行，记入 {report.imported:,} 笔")
+
+        # 倒序文件：逆序取回，每块再反转，整体即按时间正序 (同一天内保持原有先后)
+        n, done = len(spool), 0
+        for block in spool.blocks(reverse=bool(descending)):
+            _record(block[::-1] if descending else block, ledger, store, user_store, report, batch)
+            done += len(block)
+            if on_progress:
+                on_progress(0.5 + 0.5 * done / n, f"记入 {report.imported:,} 笔")
+    finally:
+        spool.close()
+    return report
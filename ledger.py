@@ -0,0 +1,237 @@
+# ==========================================
+# 交易流水与持仓 (Ledger & Positions)
+# 每笔交易追加时增量更新份额与成本，不回放历史；汇总一次向量化完成
+# ==========================================
+import numpy as np
+
+BUY = 1
+SELL = -1
+
+# 份额精度：低于该值视为已清仓
+EPS = 1e-9
+
+
+def _grown(arr, n):
+    """下标 n 超出容量时按倍数扩容 (至少容纳到 n)"""
+    if n < len(arr):
+        return arr
+    new = np.zeros((max(8, len(arr) * 2, n + 1),) + arr.shape[1:], dtype=arr.dtype)
+    new[:len(arr)] = arr
+    return new
+
+
+class Ledger:
+    """列式交易流水 + 按基金行号聚合的持仓 (移动加权平均成本)"""
+
+    def __init__(self):
+        self._n = 0
+        self._fund_row = np.zeros(0, dtype=np.int64)
+        self._side = np.zeros(0, dtype=np.int8)
+        self._amount = np.zeros(0)
+        self._nav = np.zeros(0)
+        self._shares = np.zeros(0)
+        self._date = np.zeros(0, dtype="datetime64[D]")
+
+        self._slot_of = {}  # 基金行号 -> 持仓槽位
+        self._m = 0
+        self._pos_row = np.zeros(0, dtype=np.int64)
+        self._pos_shares = np.zeros(0)
+        self._pos_cost = np.zeros(0)  # 剩余份额对应的总成本
+        self.version = 0  # 每笔交易递增 (下游按持仓缓存的结果以此失效)
+
+    def __len__(self):
+        return self._n
+
+    @classmethod
+    def from_arrays(cls, trades, pos_rows, pos_shares, pos_cost):
+        """由已保存的流水列与持仓直接构建，不回放交易"""
+        ledger = cls()
+        ledger._n = len(trades["fund_row"])
+        ledger._fund_row = np.asarray(trades["fund_row"], dtype=np.int64)
+        ledger._side = np.asarray(trades["side"], dtype=np.int8)
+        ledger._amount = np.asarray(trades["amount"], dtype=float)
+        ledger._nav = np.asarray(trades["nav"], dtype=float)
+        ledger._shares = np.asarray(trades["shares"], dtype=float)
+        ledger._date = np.asarray(trades["date"], dtype="datetime64[D]")
+        ledger._m = len(pos_rows)
+        ledger._pos_row = np.asarray(pos_rows, dtype=np.int64)
+        ledger._pos_shares = np.asarray(pos_shares, dtype=float)
+        ledger._pos_cost = np.asarray(pos_cost, dtype=float)
+        ledger._slot_of = {int(row): slot for slot, row in enumerate(ledger._pos_row)}
+        return ledger
+
+    def append(self, fund_row, side, amount, nav, date):
+        """记录一笔交易 (金额单位 CNY，按成交净值折算份额)，返回成交份额"""
+        if not (amount > 0 and nav > 0):
+            raise ValueError("金额和净值必须大于 0")
+        shares = amount / nav
+        slot = self._slot_of.get(fund_row)
+
+        if side == SELL:
+            held = self._pos_shares[slot] if slot is not None else 0.0
+            if shares > held + EPS or held <= 0:
+                raise ValueError(f"持仓不足：可卖 {held:.2f} 份")
+            shares = min(shares, held)
+            self._pos_cost[slot] -= self._pos_cost[slot] * shares / held
+            self._pos_shares[slot] -= shares
+            if self._pos_shares[slot] <= EPS:
+                self._pos_shares[slot] = 0.0
+                self._pos_cost[slot] = 0.0
+        elif side == BUY:
+            if slot is None:
+                slot = self._new_slot(fund_row)
+            self._pos_shares[slot] += shares
+            self._pos_cost[slot] += amount
+        else:
+            raise ValueError(f"未知交易方向: {side}")
+
+        i = self._n
+        for attr in ("_fund_row", "_side", "_amount", "_nav", "_shares", "_date"):
+            setattr(self, attr, _grown(getattr(self, attr), i))
+        self._fund_row[i] = fund_row
+        self._side[i] = side
+        self._amount[i] = amount
+        self._nav[i] = nav
+        self._shares[i] = shares
+        self._date[i] = np.datetime64(date, "D")
+        self._n += 1
+        self.version += 1
+        return float(shares)
+
+    def extend(self, fund_rows, sides, amounts, navs, dates):
+        """按给定顺序批量记录交易，逐笔更新持仓；不合规的交易跳过、不记入流水
+
+        返回 (记入的各笔成交份额数组, [(下标, 原因)])。
+        """
+        rows = np.asarray(fund_rows, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=float)
+        navs = np.asarray(navs, dtype=float)
+        sides = np.asarray(sides, dtype=np.int8)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = amounts / navs
+        ok = np.ones(len(rows), dtype=bool)
+        errors = []
+
+        # 只取出这批交易涉及的持仓，在 Python 列表上逐笔更新，结束后按槽位写回
+        touched, local = np.unique(rows, return_inverse=True)
+        touched = touched.tolist()
+        slots = [self._slot_of.get(row, -1) for row in touched]
+        pos_shares = [float(self._pos_shares[s]) if s >= 0 else 0.0 for s in slots]
+        pos_cost = [float(self._pos_cost[s]) if s >= 0 else 0.0 for s in slots]
+        opened = []  # 本批新开仓的 local 序号 (按首次买入顺序分配槽位)
+        for i, (j, side, amount, nav, sh) in enumerate(zip(
+                local.tolist(), sides.tolist(), amounts.tolist(), navs.tolist(), shares.tolist())):
+            if not (amount > 0 and nav > 0):
+                ok[i] = False
+                errors.append((i, "金额和净值必须大于 0"))
+                continue
+            if side == SELL:
+                held = pos_shares[j]
+                if sh > held + EPS or held <= 0:
+                    ok[i] = False
+                    errors.append((i, f"持仓不足：可卖 {held:.2f} 份"))
+                    continue
+                if sh > held:
+                    sh = shares[i] = held
+                pos_cost[j] -= pos_cost[j] * sh / held
+                pos_shares[j] -= sh
+                if pos_shares[j] <= EPS:
+                    pos_shares[j] = 0.0
+                    pos_cost[j] = 0.0
+            elif side == BUY:
+                if slots[j] == -1:
+                    slots[j] = -2  # 已开仓，写回前分配槽位
+                    opened.append(j)
+                pos_shares[j] += sh
+                pos_cost[j] += amount
+            else:
+                ok[i] = False
+                errors.append((i, f"未知交易方向: {side}"))
+
+        for j in opened:
+            slots[j] = self._new_slot(touched[j])
+        keep = [j for j, s in enumerate(slots) if s >= 0]
+        if keep:
+            idx = [slots[j] for j in keep]
+            self._pos_shares[idx] = [pos_shares[j] for j in keep]
+            self._pos_cost[idx] = [pos_cost[j] for j in keep]
+
+        k = int(ok.sum())
+        if k:
+            i, j = self._n, self._n + k
+            for attr in ("_fund_row", "_side", "_amount", "_nav", "_shares", "_date"):
+                setattr(self, attr, _grown(getattr(self, attr), j - 1))
+            self._fund_row[i:j] = rows[ok]
+            self._side[i:j] = sides[ok]
+            self._amount[i:j] = amounts[ok]
+            self._nav[i:j] = navs[ok]
+            self._shares[i:j] = shares[ok]
+            self._date[i:j] = np.asarray(dates, dtype="datetime64[D]")[ok]
+            self._n = j
+            self.version += 1
+        return shares[ok], errors
+
+    def _new_slot(self, fund_row):
+        slot = self._m
+        for attr in ("_pos_row", "_pos_shares", "_pos_cost"):
+            setattr(self, attr, _grown(getattr(self, attr), slot))
+        self._pos_row[slot] = fund_row
+        self._slot_of[fund_row] = slot
+        self._m += 1
+        return slot
+
+    def trades(self):
+        """全部流水的只读列视图"""
+        n = self._n
+        return {
+            "fund_row": self._fund_row[:n], "side": self._side[:n], "amount": self._amount[:n],
+            "nav": self._nav[:n], "shares": self._shares[:n], "date": self._date[:n],
+        }
+
+    def positions(self):
+        """当前持仓 (已清仓的除外)：(基金行号, 份额, 平均成本) 三个数组"""
+        m = self._m
+        shares = self._pos_shares[:m]
+        held = shares > EPS
+        rows = self._pos_row[:m][held]
+        shares = shares[held]
+        return rows, shares, self._pos_cost[:m][held] / shares
+
+    def shares_of(self, fund_row):
+        slot = self._slot_of.get(fund_row)
+        return float(self._pos_shares[slot]) if slot is not None else 0.0
+
+    def position_of(self, fund_row):
+        """(份额, 总成本)，无持仓为 (0, 0)"""
+        slot = self._slot_of.get(fund_row)
+        if slot is None:
+            return 0.0, 0.0
+        return float(self._pos_shares[slot]), float(self._pos_cost[slot])
+
+    def summary(self, nav, change_pct, quoted=None):
+        """以基金表的 nav / 涨跌幅数组一次性算出持仓明细与总资产、累计盈亏、今日盈亏
+
+        quoted 为基金表的"已有行情"掩码：没有行情的持仓市值与盈亏为 NaN，不计入合计，
+        条数放在 unquoted。
+        """
+        rows, shares, avg_cost = self.positions()
+        live = quoted[rows] if quoted is not None else np.ones(len(rows), dtype=bool)
+        cur = np.where(live, nav[rows], np.nan)
+        market_vals = cur * shares
+        costs = avg_cost * shares
+        gains = market_vals - costs
+        total_asset = market_vals[live].sum()
+        total_cost = costs[live].sum()
+        day_gains = (cur - cur / (1 + change_pct[rows] / 100)) * shares
+        return {
+            "rows": rows,
+            "shares": shares,
+            "avg_cost": avg_cost,
+            "market_vals": market_vals,
+            "gains": gains,
+            "total_asset": total_asset,
+            "total_cost": total_cost,
+            "total_gain": total_asset - total_cost,
+            "day_gain": day_gains[live].sum(),
+            "unquoted": int((~live).sum()),
+        }
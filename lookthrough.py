@@ -0,0 +1,140 @@
+# ==========================================
+# 持仓穿透 (Look-through Exposure)
+# 把所有基金的重仓股拼成一张稀疏的 基金 × 证券 权重矩阵 (CSR：indptr / indices / weights)，
+# 组合对每只证券、每个板块的敞口都只需一次矩阵-向量乘积 (按证券列 bincount)。
+# 矩阵由共享基金池构建，进程内只保存一份，在基金持仓变化前保持不变；
+# 每个会话只缓存自己持仓对应的子矩阵与结果，在持仓份额或净值变化前复用。
+# ==========================================
+import threading
+
+import numpy as np
+
+
+class HoldingsMatrix:
+    """基金 × 证券权重矩阵；行与 FundStore 行号对齐，权重为占基金净值的比例 (percent / 100)"""
+
+    def __init__(self, indptr, indices, weights, security_keys, security_names, security_sector, change):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.security_keys = security_keys
+        self.security_names = security_names
+        self.security_sector = security_sector  # 证券 -> 板块 id
+        self.change = change                    # 证券当日涨跌幅 (%)
+        sectors, self.sector_index = np.unique(security_sector.astype(str), return_inverse=True)
+        self.sectors = sectors.tolist()
+        self.key = None  # 构建时基金表的 (id, 持仓版本)
+
+    @classmethod
+    def build(cls, holdings, sector_ids):
+        """holdings: 每行一个持仓列表 [{"name", "percent", "change", 可选 "code" / "sectorId"}]；
+        证券没有板块信息时归入所属基金的板块"""
+        col_of, keys, names, sectors, cols, weights, changes = {}, [], [], [], [], [], []
+        indptr = np.zeros(len(holdings) + 1, dtype=np.int64)
+        for row, (items, fund_sector) in enumerate(zip(holdings, sector_ids)):
+            for h in items:
+                key = h.get("code") or h["name"]
+                j = col_of.get(key)
+                if j is None:
+                    j = col_of[key] = len(keys)
+                    keys.append(key)
+                    names.append(h["name"])
+                    sectors.append(h.get("sectorId", fund_sector))
+                    changes.append(0.0)
+                cols.append(j)
+                weights.append(h["percent"] / 100)
+                changes[j] = h.get("change", changes[j])
+            indptr[row + 1] = len(cols)
+        return cls(indptr, np.array(cols, dtype=np.intp), np.array(weights), keys, names,
+                   np.array(sectors, dtype=object), np.array(changes))
+
+    @property
+    def shape(self):
+        return len(self.indptr) - 1, len(self.security_keys)
+
+    def select(self, rows):
+        """只保留给定行的子矩阵：(每个非零元对应的行序号, 列号, 权重)"""
+        rows = np.asarray(rows, dtype=np.intp)
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        counts = ends - starts
+        # 每个选中行的非零元在原数组中的位置
+        offsets = np.repeat(starts - np.r_[0, np.cumsum(counts)[:-1]], counts)
+        nz = np.arange(counts.sum()) + offsets
+        return np.repeat(np.arange(len(rows)), counts), self.indices[nz], self.weights[nz]
+
+
+_matrix_lock = threading.Lock()
+_matrix_cache = (None, None)
+
+
+def holdings_matrix(store):
+    """基金表的权重矩阵 (进程内共享，按基金表的持仓版本缓存)"""
+    global _matrix_cache
+    key = (id(store), store.holdings_version)
+    cached_key, matrix = _matrix_cache
+    if cached_key != key:
+        with _matrix_lock:
+            cached_key, matrix = _matrix_cache
+            if cached_key != key:
+                matrix = HoldingsMatrix.build(store.holdings[:len(store)], store.sector_ids[:len(store)])
+                matrix.key = key
+                _matrix_cache = (key, matrix)
+    return matrix
+
+
+class LookThrough:
+    """一个会话的组合穿透：持仓子矩阵按交易流水版本缓存，结果按持仓市值缓存"""
+
+    def __init__(self):
+        self._selection = None
+        self._selection_key = None
+        self._result = None
+        self._result_key = None
+
+    def matrix(self, store):
+        return holdings_matrix(store)
+
+    def exposure(self, store, ledger):
+        """组合敞口：按证券 / 按板块的持仓市值，以及重仓股覆盖的市值比例"""
+        matrix = self.matrix(store)
+        sel_key = (matrix.key, id(ledger), ledger.version)
+        if sel_key != self._selection_key:
+            rows, shares, _ = ledger.positions()
+            self._selection = (rows, shares, *matrix.select(rows))
+            self._selection_key = sel_key
+        rows, shares, pos, cols, weights = self._selection
+
+        # 没有行情的基金 nav 只是占位值，不计入敞口
+        values = np.where(store.quoted[rows], store.nav[rows] * shares, 0.0)
+        result_key = (sel_key, values.tobytes())
+        if result_key == self._result_key:
+            return self._result
+
+        # 一次矩阵-向量乘积：证券敞口 = 权重矩阵ᵀ · 持仓市值
+        n_sec = matrix.shape[1]
+        by_security = np.bincount(cols, weights * values[pos], minlength=n_sec)
+        by_sector = np.bincount(matrix.sector_index, by_security, minlength=len(matrix.sectors))
+        total = values.sum()
+        self._result = {
+            "total": total,
+            "by_security": by_security,
+            "sectors": matrix.sectors,
+            "by_sector": by_sector,
+            "covered": by_security.sum() / total if total > 0 else 0.0,
+        }
+        self._result_key = result_key
+        return self._result
+
+    def day_gain(self, store, ledger):
+        """按重仓股当日涨跌估算的今日盈亏 (只覆盖披露的重仓部分)"""
+        matrix = self.matrix(store)
+        return float(self.exposure(store, ledger)["by_security"] @ matrix.change) / 100
+
+    def top_securities(self, store, ledger, k=10):
+        """敞口最大的 k 只证券：[(名称, 市值, 占组合比例, 当日涨跌幅)]"""
+        matrix = self.matrix(store)
+        result = self.exposure(store, ledger)
+        by_security, total = result["by_security"], result["total"]
+        top = np.argsort(by_security)[::-1][:k]
+        return [(matrix.security_names[j], float(by_security[j]), float(by_security[j] / total) if total > 0 else 0.0,
+                 float(matrix.change[j])) for j in top if by_security[j] > 0]
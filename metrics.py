@@ -0,0 +1,181 @@
+# ==========================================
+# 性能埋点 (Profiling Spans & Metrics)
+# 命名耗时区间 + 计数器，进程内所有会话共享；保留最近 WINDOW 次耗时用于滚动分位数。
+#
+# 开启: GUGU_METRICS=1 (或在调试面板里手动切换，作用于整个进程)；关闭时 span() 返回共享的空上下文，timed() 只多一次判断。
+# 导出: GUGU_METRICS_FILE=metrics.prom (Prometheus 文本，整体覆盖写)
+#       或 metrics.jsonl (每次追加一行 JSON 快照)，每 EXPORT_INTERVAL 秒由后台线程写出。
+# ==========================================
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from functools import wraps
+
+import numpy as np
+
+WINDOW = 1024
+QUANTILES = (0.5, 0.9, 0.99)
+EXPORT_PATH = os.environ.get("GUGU_METRICS_FILE", "")
+EXPORT_INTERVAL = float(os.environ.get("GUGU_METRICS_INTERVAL", "15"))
+
+_NULL_SPAN = nullcontext()
+
+
+class _Series:
+    """单个区间的累计次数/总耗时 + 最近 WINDOW 次耗时 (毫秒)"""
+
+    __slots__ = ("count", "total", "errors", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.recent = deque(maxlen=WINDOW)
+
+
+class _Span:
+    __slots__ = ("_registry", "_name", "_t0")
+
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # st.rerun()/st.stop() 通过异常跳出，不算出错
+        failed = exc_type is not None and exc_type.__name__ not in ("RerunException", "StopException")
+        self._registry.observe(self._name, (time.perf_counter() - self._t0) * 1000, failed)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=False, export_path=""):
+        self.enabled = enabled
+        self.export_path = export_path
+        self._series = defaultdict(_Series)
+        self._counters = defaultdict(float)  # (名称, 标签元组) -> 值
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    def span(self, name):
+        """with metrics.span("view.market"): ... —— 关闭时返回空上下文"""
+        if not self.enabled:
+            return _NULL_SPAN
+        self._ensure_exporter()
+        return _Span(self, name)
+
+    def timed(self, name=None):
+        """函数装饰器版本的 span，默认以函数名命名"""
+        def decorate(fn):
+            span_name = name or fn.__name__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.span(span_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def observe(self, name, ms, failed=False):
+        """记录一次耗时 (毫秒)；不便用 with 包裹的代码段可自行计时后调用"""
+        if not self.enabled:
+            return
+        with self._lock:
+            s = self._series[name]
+            s.count += 1
+            s.total += ms
+            s.errors += failed
+            s.recent.append(ms)
+
+    def inc(self, name, value=1, **labels):
+        """计数器累加，例如 inc("upstream_requests", status="200")"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """当前数据：{"spans": {名称: 统计}, "counters": [{name, labels, value}]}"""
+        with self._lock:
+            series = {name: (s.count, s.total, s.errors, np.array(s.recent)) for name, s in self._series.items()}
+            counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in self._counters.items()]
+        spans = {}
+        for name, (count, total, errors, recent) in sorted(series.items()):
+            qs = np.quantile(recent, QUANTILES) if len(recent) else [0.0] * len(QUANTILES)
+            spans[name] = {"count": count, "errors": errors, "total_ms": round(total, 3),
+                           "mean_ms": round(total / count, 3) if count else 0.0,
+                           **{f"p{int(q * 100)}_ms": round(float(v), 3) for q, v in zip(QUANTILES, qs)}}
+        return {"time": time.time(), "spans": spans, "counters": counters}
+
+    def to_prometheus(self, snap=None):
+        """Prometheus 文本格式：区间为 summary (滚动窗口分位数)，计数器为 counter"""
+        snap = snap or self.snapshot()
+        lines = ["# TYPE gugu_span_ms summary"]
+        for name, s in snap["spans"].items():
+            for q in QUANTILES:
+                lines.append(f'gugu_span_ms{{span="{name}",quantile="{q}"}} {s[f"p{int(q * 100)}_ms"]}')
+            lines.append(f'gugu_span_ms_sum{{span="{name}"}} {s["total_ms"]}')
+            lines.append(f'gugu_span_ms_count{{span="{name}"}} {s["count"]}')
+        lines.append("# TYPE gugu_span_errors_total counter")
+        for name, s in snap["spans"].items():
+            lines.append(f'gugu_span_errors_total{{span="{name}"}} {s["errors"]}')
+        typed = set()
+        for c in sorted(snap["counters"], key=lambda c: c["name"]):
+            metric = f"gugu_{c['name']}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            labels = ",".join(f'{k}="{v}"' for k, v in c["labels"].items())
+            lines.append(f"{metric}{{{labels}}} {c['value']:g}" if labels else f"{metric} {c['value']:g}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """按扩展名写出：.jsonl 追加一行快照，其他覆盖写 Prometheus 文本"""
+        path = path or self.export_path
+        if not path:
+            return
+        snap = self.snapshot()
+        if path.endswith(".jsonl"):
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(snap, ensure_ascii=False) + "\n")
+        else:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus(snap))
+            os.replace(tmp, path)  # 抓取方不会读到写了一半的文件
+
+    def _ensure_exporter(self):
+        if self._exporter is not None or not self.export_path:
+            return
+        with self._lock:
+            if self._exporter is None:
+                self._exporter = threading.Thread(target=self._export_loop, name="metrics-exporter", daemon=True)
+                self._exporter.start()
+
+    def _export_loop(self):
+        while True:
+            time.sleep(EXPORT_INTERVAL)
+            if self.enabled:
+                try:
+                    self.export()
+                except OSError:
+                    pass
+
+
+metrics = Metrics(enabled=os.environ.get("GUGU_METRICS", "0") == "1", export_path=EXPORT_PATH)
+span = metrics.span
+timed = metrics.timed
@@ -0,0 +1,128 @@
+# ==========================================
+# 历史净值存储 (NAV History Store)
+# 每只基金一个只追加的二进制文件：(日期, 净值) 定长记录，按日期递增。
+# 读取时 memmap 整个文件，区间查询用二分定位后直接切片，不复制数据。
+#
+# 批量导入: python -m navstore data1.csv [data2.csv ...]
+#   CSV 需包含 code, date, nav 三列 (每日净值文件或单只基金的历史文件均可)
+# ==========================================
+import os
+import sys
+import threading
+
+import numpy as np
+
+NAV_DIR = os.environ.get("GUGU_NAV_DIR", os.path.join("data", "nav"))
+
+RECORD = np.dtype([("date", "<M8[D]"), ("nav", "<f8")])
+
+# 区间 -> 向前回溯的天数 (以最新一条记录为终点)
+RANGES = {"30D": 30, "1Y": 365, "3Y": 3 * 365, "ALL": None}
+
+
+class NavStore:
+    def __init__(self, root=NAV_DIR):
+        self.root = root
+        self._maps = {}  # code -> (文件大小, memmap)
+        self._lock = threading.Lock()
+
+    def _path(self, code):
+        return os.path.join(self.root, f"{code}.nav")
+
+    def _records(self, code):
+        """当前文件的只读 memmap；文件被追加后自动重新映射"""
+        path = self._path(code)
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            return np.empty(0, dtype=RECORD)
+        cached = self._maps.get(code)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        count = size // RECORD.itemsize
+        records = np.memmap(path, dtype=RECORD, mode="r", shape=(count,)) if count else np.empty(0, dtype=RECORD)
+        self._maps[code] = (size, records)
+        return records
+
+    def version(self, code):
+        """数据版本 (记录条数)，用于下游缓存的键"""
+        return len(self._records(code))
+
+    def read(self, code, start=None, end=None):
+        """[start, end] 区间的 (日期, 净值)，均为 memmap 上的视图"""
+        records = self._records(code)
+        dates = records["date"]
+        i = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D"), side="left")
+        j = len(records) if end is None else np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+        window = records[i:j]
+        return window["date"], window["nav"]
+
+    def range(self, code, period):
+        """按 RANGES 中的区间读取，终点为最新一条记录"""
+        records = self._records(code)
+        days = RANGES[period]
+        if days is None or not len(records):
+            return records["date"], records["nav"]
+        return self.read(code, start=records["date"][-1] - np.timedelta64(days, "D"))
+
+    def tail(self, code, n):
+        """最近 n 条净值"""
+        return self._records(code)["nav"][-n:]
+
+    def recent(self, code, n):
+        """最近 n 条 (日期, 净值)"""
+        window = self._records(code)[-n:]
+        return window["date"], window["nav"]
+
+    def nav_on(self, code, date):
+        """某一天的净值；当天没有记录时返回 None"""
+        dates = self._records(code)["date"]
+        day = np.datetime64(date, "D")
+        i = np.searchsorted(dates, day)
+        if i < len(dates) and dates[i] == day:
+            return float(self._records(code)["nav"][i])
+        return None
+
+    def append(self, code, dates, navs):
+        """追加记录，只保留晚于已有最新日期的部分；返回写入条数"""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        navs = np.asarray(navs, dtype=float)
+        order = np.argsort(dates, kind="stable")
+        dates, navs = dates[order], navs[order]
+        with self._lock:
+            records = self._records(code)
+            if len(records):
+                keep = dates > records["date"][-1]
+                dates, navs = dates[keep], navs[keep]
+            # 同一批内重复日期只保留最后一条
+            if len(dates):
+                last = np.append(dates[1:] != dates[:-1], True)
+                dates, navs = dates[last], navs[last]
+            if not len(dates):
+                return 0
+            out = np.empty(len(dates), dtype=RECORD)
+            out["date"] = dates
+            out["nav"] = navs
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._path(code), "ab") as f:
+                f.write(out.tobytes())
+        return len(out)
+
+    def ingest_csv(self, path):
+        """导入 code, date, nav 格式的净值文件，返回写入条数"""
+        import pandas as pd
+
+        df = pd.read_csv(path, dtype={"code": str}, usecols=["code", "date", "nav"])
+        df["date"] = pd.to_datetime(df["date"]).values.astype("datetime64[D]")
+        total = 0
+        for code, group in df.groupby("code", sort=False):
+            total += self.append(code, group["date"].to_numpy(), group["nav"].to_numpy())
+        return total
+
+
+nav_store = NavStore()
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        print(f"{path}: {nav_store.ingest_csv(path)} 条")
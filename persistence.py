@@ -0,0 +1,250 @@
+# ==========================================
+# 本地持久化 (Persistence) - SQLite WAL
+# 自选、分组、交易流水和持仓按用户增量写入；会话开始时一次性批量读取
+# ==========================================
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from ledger import Ledger
+from store import Watchlist
+
+DB_PATH = os.environ.get("GUGU_DB_PATH", "gugu.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    uid TEXT PRIMARY KEY,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS funds (
+    uid TEXT NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    sector_id TEXT NOT NULL,
+    PRIMARY KEY (uid, code)
+);
+CREATE TABLE IF NOT EXISTS watchlist (
+    uid TEXT NOT NULL,
+    code TEXT NOT NULL,
+    grp TEXT,
+    pos INTEGER NOT NULL,
+    PRIMARY KEY (uid, code)
+);
+CREATE TABLE IF NOT EXISTS trades (
+    uid TEXT NOT NULL,
+    code TEXT NOT NULL,
+    side INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    nav REAL NOT NULL,
+    shares REAL NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_uid ON trades (uid);
+CREATE TABLE IF NOT EXISTS positions (
+    uid TEXT NOT NULL,
+    code TEXT NOT NULL,
+    shares REAL NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (uid, code)
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    uid TEXT NOT NULL,
+    code TEXT NOT NULL,
+    kind INTEGER NOT NULL,
+    threshold REAL NOT NULL,
+    PRIMARY KEY (uid, code, kind)
+);
+"""
+
+_lock = threading.Lock()
+_conns = {}
+
+
+def connect(path=DB_PATH):
+    """进程内按路径共享一个连接 (WAL 模式，读写由锁串行化)"""
+    with _lock:
+        conn = _conns.get(path)
+        if conn is None:
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            _conns[path] = conn
+        return conn
+
+
+class UserState:
+    """会话开始时一次性读出的用户数据 (交易流水为列数组)"""
+
+    def __init__(self, funds, watchlist, trades, positions, alerts=()):
+        self.funds = funds          # [(code, name, sector_id)]
+        self.watchlist = watchlist  # [(code, group)]，按加入顺序
+        self.trades = trades        # {列名: ndarray}
+        self.positions = positions  # [(code, shares, cost)]
+        self.alerts = alerts        # [(code, kind, threshold)]
+
+
+class UserStore:
+    """单个用户的增量读写"""
+
+    def __init__(self, uid, path=DB_PATH):
+        self.uid = uid
+        self._conn = connect(path)
+
+    def load(self):
+        """一次读事务取回全部数据；新用户返回 None"""
+        with _lock:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                if cur.execute("SELECT 1 FROM users WHERE uid = ?", (self.uid,)).fetchone() is None:
+                    return None
+                funds = cur.execute("SELECT code, name, sector_id FROM funds WHERE uid = ?", (self.uid,)).fetchall()
+                watchlist = cur.execute("SELECT code, grp FROM watchlist WHERE uid = ? ORDER BY pos", (self.uid,)).fetchall()
+                rows = cur.execute(
+                    "SELECT code, side, amount, nav, shares, date FROM trades WHERE uid = ? ORDER BY rowid",
+                    (self.uid,)).fetchall()
+                positions = cur.execute("SELECT code, shares, cost FROM positions WHERE uid = ?", (self.uid,)).fetchall()
+                alerts = cur.execute("SELECT code, kind, threshold FROM alerts WHERE uid = ?", (self.uid,)).fetchall()
+            finally:
+                cur.execute("COMMIT")
+        cols = list(zip(*rows)) or [()] * 6
+        trades = {
+            "code": np.array(cols[0], dtype=object),
+            "side": np.array(cols[1], dtype=np.int8),
+            "amount": np.array(cols[2], dtype=float),
+            "nav": np.array(cols[3], dtype=float),
+            "shares": np.array(cols[4], dtype=float),
+            "date": np.array(cols[5], dtype="datetime64[D]"),
+        }
+        return UserState(funds, watchlist, trades, positions, alerts)
+
+    def _write(self, statements):
+        """在一个事务内执行；params 为列表时按 executemany 批量写入"""
+        with _lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        self._conn.executemany(sql, params)
+                    else:
+                        self._conn.execute(sql, params)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _fund_stmt(self, code, name, sector_id):
+        return ("INSERT OR IGNORE INTO funds VALUES (?, ?, ?, ?)", (self.uid, code, name, sector_id))
+
+    def create(self, funds=(), watchlist=(), trades=(), positions=()):
+        """新用户首次落盘 (一次事务)"""
+        self._write([
+            ("INSERT OR IGNORE INTO users VALUES (?, ?)", (self.uid, time.time())),
+            ("INSERT OR IGNORE INTO funds VALUES (?, ?, ?, ?)", [(self.uid, *f) for f in funds]),
+            ("INSERT OR REPLACE INTO watchlist VALUES (?, ?, ?, ?)",
+             [(self.uid, code, grp, pos) for pos, (code, grp) in enumerate(watchlist)]),
+            ("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?)", [(self.uid, *t) for t in trades]),
+            ("INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?)", [(self.uid, *p) for p in positions]),
+        ])
+
+    def watch_added(self, fund, group=None):
+        self._write([
+            self._fund_stmt(fund['code'], fund['name'], fund['sectorId']),
+            ("INSERT OR REPLACE INTO watchlist VALUES (?, ?, ?, "
+             "(SELECT COALESCE(MAX(pos), -1) + 1 FROM watchlist WHERE uid = ?))",
+             (self.uid, fund['code'], group, self.uid)),
+        ])
+
+    def watch_removed(self, code):
+        self._write([("DELETE FROM watchlist WHERE uid = ? AND code = ?", (self.uid, code))])
+
+    def group_changed(self, code, group):
+        self._write([("UPDATE watchlist SET grp = ? WHERE uid = ? AND code = ?", (group, self.uid, code))])
+
+    def trade_added(self, fund, side, amount, nav, shares, date, pos_shares, pos_cost):
+        """追加一笔交易并同步该基金的持仓 (同一事务)"""
+        self._write([
+            self._fund_stmt(fund['code'], fund['name'], fund['sectorId']),
+            ("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?)",
+             (self.uid, fund['code'], int(side), float(amount), float(nav), float(shares), str(date))),
+            ("INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?)",
+             (self.uid, fund['code'], float(pos_shares), float(pos_cost))),
+        ])
+
+    def trades_imported(self, funds, trades, positions):
+        """批量导入的一批交易 (同一事务)：涉及的基金、流水与这些基金的最新持仓"""
+        self._write([
+            ("INSERT OR IGNORE INTO funds VALUES (?, ?, ?, ?)", [(self.uid, *f) for f in funds]),
+            ("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?)", [(self.uid, *t) for t in trades]),
+            ("INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?)", [(self.uid, *p) for p in positions]),
+        ])
+
+    def alert_set(self, fund, kind, threshold):
+        self._write([
+            self._fund_stmt(fund['code'], fund['name'], fund['sectorId']),
+            ("INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?)", (self.uid, fund['code'], int(kind), float(threshold))),
+        ])
+
+    def alert_removed(self, code, kind):
+        self._write([("DELETE FROM alerts WHERE uid = ? AND code = ? AND kind = ?", (self.uid, code, int(kind)))])
+
+
+def restore_session(state, store):
+    """把读出的用户数据挂到基金表上，返回 (Watchlist, Ledger)
+
+    基金表中没有的代码先以占位行情加入，后台轮询会补上实时数据。
+    """
+    for code, name, sector_id in state.funds:
+        if store.index_of_code(code) is None:
+            store.add(code, name, sector_id, 1.0, 0.0, [1.0])
+
+    watchlist = Watchlist()
+    for code, group in state.watchlist:
+        row = store.index_of_code(code)
+        if row is not None:
+            watchlist.add(store.ids[row], group)
+
+    codes = state.trades["code"]
+    fund_rows = np.fromiter(map(store.index_of_code, codes), dtype=np.int64, count=len(codes))
+    trades = dict(state.trades, fund_row=fund_rows)
+    pos_rows = [store.index_of_code(code) for code, _, _ in state.positions]
+    ledger = Ledger.from_arrays(
+        trades,
+        pos_rows,
+        [shares for _, shares, _ in state.positions],
+        [cost for _, _, cost in state.positions],
+    )
+    return watchlist, ledger
+
+
+def save_session(user_store, store, watchlist, ledger):
+    """把会话内的自选与持仓整体写入 (仅用于新用户首次落盘)"""
+    trades = ledger.trades()
+    pos_rows, pos_shares, avg_cost = ledger.positions()
+    referenced = set(trades["fund_row"].tolist()) | {store.index_of_id(fid) for fid in watchlist}
+    user_store.create(
+        funds=[(store.codes[r], store.names[r], store.sector_ids[r]) for r in sorted(referenced)],
+        watchlist=[(store.codes[store.index_of_id(fid)], watchlist.group_of(fid)) for fid in watchlist],
+        trades=[
+            (store.codes[r], int(side), float(amount), float(nav), float(shares), str(date))
+            for r, side, amount, nav, shares, date in zip(
+                trades["fund_row"], trades["side"], trades["amount"],
+                trades["nav"], trades["shares"], trades["date"])
+        ],
+        positions=[(store.codes[r], float(sh), float(sh * c)) for r, sh, c in zip(pos_rows, pos_shares, avg_cost)],
+    )
+
+
+def restore_alerts(state, store, ledger, book, uid):
+    """把用户保存的提醒规则登记到进程内的规则表 (本进程已登记过的用户跳过)；回撤提醒带上当前持仓成本"""
+    if book.has_user(uid):
+        return
+    for code, kind, threshold in state.alerts:
+        row = store.index_of_code(code)
+        if row is not None:
+            shares, cost = ledger.position_of(row)
+            book.set_rule(uid, row, kind, threshold, cost / shares if shares else 0.0)
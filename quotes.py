@@ -0,0 +1,505 @@
+# ==========================================
+# 行情服务 (Quote Service)
+# 进程级共享：Streamlit 每次 rerun 都会重新执行 app.py，
+# 连接池与线程池必须放在被 import 的模块里才能跨会话复用。
+# ==========================================
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+from ticks import tick_recorder
+
+# 行情接口地址 (压测时可指向本地桩服务器)
+FUNDGZ_BASE = os.environ.get("GUGU_FUNDGZ_BASE", "http://fundgz.1234567.com.cn")
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# 单个请求超时上限 (秒)；实际超时取最近成功请求耗时的 P99 × TIMEOUT_FACTOR，不低于 MIN_TIMEOUT
+FETCH_TIMEOUT = 1
+MIN_TIMEOUT = 0.2
+TIMEOUT_FACTOR = 3
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+# 批量请求的并发上限与整体截止时间 (秒)
+MAX_WORKERS = 16
+BATCH_DEADLINE = 2.0
+
+# 缓存：交易时段内的有效期、非交易时段上限、失败结果的有效期 (秒) 与条目上限
+TRADING_TTL = 30
+OFF_HOURS_TTL = 600
+NEGATIVE_TTL = 5
+CACHE_MAXSIZE = 4096
+# 过期后仍可作为陈旧数据返回的时长 (秒)，期间在后台重新获取
+STALE_TTL = 24 * 3600
+
+# 熔断 (按上游主机)：最近 BREAKER_WINDOW 次调用中失败占比达到 BREAKER_RATIO
+# (且不少于 BREAKER_MIN_CALLS 次) 时打开，直接失败；BREAKER_COOLDOWN 秒后放行一次试探
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10
+BREAKER_RATIO = 0.8
+BREAKER_COOLDOWN = 10
+
+# 后台轮询间隔 (秒)；会话超过 SESSION_IDLE 秒未续约则不再轮询它的代码
+POLL_INTERVAL = float(os.environ.get("GUGU_POLL_INTERVAL", 10))
+SESSION_IDLE = 300
+
+# A 股交易时段 (北京时间，无夏令时)
+CN_TZ = timezone(timedelta(hours=8))
+TRADING_SESSIONS = (
+    (datetime.strptime("09:30", "%H:%M").time(), datetime.strptime("11:30", "%H:%M").time()),
+    (datetime.strptime("13:00", "%H:%M").time(), datetime.strptime("15:00", "%H:%M").time()),
+)
+
+_lock = threading.Lock()
+_session = None
+_executor = None
+
+
+def get_session():
+    """进程内共享的 keep-alive 连接池"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_WORKERS)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                s.headers.update(HEADERS)
+                _session = s
+    return _session
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="quote")
+    return _executor
+
+
+def parse_jsonpgz(text):
+    """解析 jsonpgz({...}); 格式的返回"""
+    if "jsonpgz(" in text:
+        content = text.split("jsonpgz(")[1].rstrip(");")
+        return json.loads(content)
+    return None
+
+
+class QuoteError(Exception):
+    """行情获取失败 (按类型区分，供缓存统计与页面提示)"""
+
+
+class UpstreamTimeout(QuoteError):
+    pass
+
+
+class UpstreamConnectionError(QuoteError):
+    pass
+
+
+class UpstreamHTTPError(QuoteError):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class UpstreamParseError(QuoteError):
+    """返回内容无法解析 (通常是代码不存在)"""
+
+
+class CircuitOpenError(QuoteError):
+    """熔断打开期间直接失败，不发请求"""
+
+
+class HostGuard:
+    """单个上游主机的自适应超时 + 熔断器"""
+
+    def __init__(self):
+        self._latency = deque(maxlen=LATENCY_WINDOW)   # 最近成功请求耗时 (秒)
+        self._outcomes = deque(maxlen=BREAKER_WINDOW)  # 最近调用是否成功
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def timeout(self):
+        with self._lock:
+            n = len(self._latency)
+            if n < LATENCY_MIN_SAMPLES:
+                return FETCH_TIMEOUT
+            p99 = sorted(self._latency)[int((n - 1) * 0.99)]
+        return min(FETCH_TIMEOUT, max(MIN_TIMEOUT, p99 * TIMEOUT_FACTOR))
+
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if self._probing else "open"
+
+    def before_call(self):
+        """熔断打开时抛出 CircuitOpenError；冷却期过后只放行一个试探请求"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if self._probing or time.monotonic() - self._opened_at < BREAKER_COOLDOWN:
+                raise CircuitOpenError("上游熔断中")
+            self._probing = True
+
+    def record(self, ok, latency=None):
+        with self._lock:
+            if ok and latency is not None:
+                self._latency.append(latency)
+            if self._probing:
+                # 试探结果决定关闭还是重新计时
+                self._probing = False
+                if ok:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return
+            self._outcomes.append(ok)
+            n = len(self._outcomes)
+            if self._opened_at is None and n >= BREAKER_MIN_CALLS and self._outcomes.count(False) >= n * BREAKER_RATIO:
+                self._opened_at = time.monotonic()
+                opened = True
+            else:
+                opened = False
+        if opened:
+            metrics.inc("circuit_opened")
+
+
+_guards = {}
+
+
+def host_guard(base=None):
+    """按主机共享的 HostGuard"""
+    host = urlsplit(base or FUNDGZ_BASE).netloc
+    guard = _guards.get(host)
+    if guard is None:
+        with _lock:
+            guard = _guards.setdefault(host, HostGuard())
+    return guard
+
+
+def _fetch_upstream(code, timeout=None):
+    """直接请求上游接口；失败抛出 QuoteError 的子类"""
+    guard = host_guard()
+    with metrics.span("fetch"):
+        guard.before_call()
+        t0 = time.perf_counter()
+        try:
+            r = get_session().get(f"{FUNDGZ_BASE}/js/{code}.js", timeout=timeout or guard.timeout())
+        except requests.Timeout as e:
+            guard.record(False)
+            metrics.inc("upstream_requests", status="timeout")
+            raise UpstreamTimeout(code) from e
+        except requests.RequestException as e:
+            guard.record(False)
+            metrics.inc("upstream_requests", status="error")
+            raise UpstreamConnectionError(str(e)) from e
+        metrics.inc("upstream_requests", status=str(r.status_code))
+        metrics.inc("upstream_bytes", len(r.content))
+        # 5xx 计入熔断；4xx / 解析失败是代码本身的问题，不算上游故障
+        guard.record(r.status_code < 500, time.perf_counter() - t0)
+        if r.status_code != 200:
+            raise UpstreamHTTPError(r.status_code)
+        r.encoding = "utf-8"
+        try:
+            data = parse_jsonpgz(r.text)
+        except ValueError as e:
+            raise UpstreamParseError(code) from e
+        if data is None:
+            raise UpstreamParseError(code)
+        return data
+
+
+def quote_ttl(now=None):
+    """缓存有效期跟随交易时段：盘中短，盘前/午休到下一时段开盘，收盘后取上限"""
+    now = now or datetime.now(CN_TZ)
+    if now.weekday() < 5:
+        t = now.time()
+        for start, end in TRADING_SESSIONS:
+            if start <= t < end:
+                return TRADING_TTL
+        for start, _ in TRADING_SESSIONS:
+            if t < start:
+                until_open = (datetime.combine(now.date(), start, CN_TZ) - now).total_seconds()
+                return max(1.0, min(OFF_HOURS_TTL, until_open))
+    return OFF_HOURS_TTL
+
+
+_MISSING = object()
+
+
+def _as_stale(data):
+    return {**data, "stale": True}
+
+
+class QuoteCache:
+    """进程内行情缓存：按条目 TTL 过期、LRU 淘汰，并发的相同请求合并为一次上游调用
+
+    过期但仍在 STALE_TTL 内的数据先以 stale=True 返回，同时在后台重新获取；
+    获取失败时保留上一次成功的数据，错误按类型计数并记录在 last_error(code)。
+    """
+
+    def __init__(self, loader, maxsize=CACHE_MAXSIZE, ttl=quote_ttl, stale_ttl=STALE_TTL):
+        self._loader = loader
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._data = OrderedDict()  # code -> (过期时刻, 数据, 最早可重试时刻)
+        self._inflight = {}         # code -> Future
+        self._last_error = {}       # code -> 最近一次 QuoteError
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+        self.errors = Counter()     # 错误类型名 -> 次数
+
+    def _cached(self, code, now):
+        """在锁内查缓存：返回 (数据或 _MISSING, 需要后台刷新时的 Future)"""
+        entry = self._data.get(code)
+        if entry is None:
+            return _MISSING, None
+        expires, value, retry_at = entry
+        if expires > now:
+            self._data.move_to_end(code)
+            self.hits += 1
+            return value, None
+        if value is None or now >= expires + self._stale_ttl:
+            return _MISSING, None
+        self._data.move_to_end(code)
+        self.stale += 1
+        fut = None
+        if now >= retry_at and code not in self._inflight:
+            fut = self._inflight[code] = Future()
+            self.misses += 1
+        return _as_stale(value), fut
+
+    def _revalidate(self, code, fut):
+        _get_executor().submit(self._load, code, fut)
+
+    def peek(self, code):
+        """仅查缓存 (可能返回陈旧数据并触发后台刷新)，未命中返回 _MISSING"""
+        with self._lock:
+            value, fut = self._cached(code, time.monotonic())
+        if fut is not None:
+            self._revalidate(code, fut)
+        return value
+
+    def get(self, code, refresh=False):
+        with self._lock:
+            if not refresh:
+                value, fut = self._cached(code, time.monotonic())
+                if value is not _MISSING:
+                    if fut is not None:
+                        self._revalidate(code, fut)
+                    return value
+            fut = self._inflight.get(code)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[code] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return fut.result()
+        return self._load(code, fut)
+
+    def _load(self, code, fut):
+        error = None
+        try:
+            value = self._loader(code)
+        except QuoteError as e:
+            value, error = None, e
+        except BaseException as e:
+            # 非预期异常不吞掉：交给调用方
+            with self._lock:
+                del self._inflight[code]
+            fut.set_exception(e)
+            raise
+        now = time.monotonic()
+        with self._lock:
+            old = self._data.get(code)
+            if value is not None:
+                self._data[code] = (now + self._ttl(), value, now)
+                self._last_error.pop(code, None)
+                result = value
+            else:
+                if error is not None:
+                    self.errors[type(error).__name__] += 1
+                    self._last_error[code] = error
+                if old is not None and old[1] is not None and now < old[0] + self._stale_ttl:
+                    # 保留上一次成功的数据，NEGATIVE_TTL 后再重试
+                    self._data[code] = (old[0], old[1], now + NEGATIVE_TTL)
+                    result = _as_stale(old[1])
+                else:
+                    self._data[code] = (now + NEGATIVE_TTL, None, now + NEGATIVE_TTL)
+                    result = None
+            self._data.move_to_end(code)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+            del self._inflight[code]
+        if error is not None:
+            metrics.inc("quote_errors", type=type(error).__name__)
+        fut.set_result(result)
+        return result
+
+    def last_error(self, code):
+        """最近一次获取失败的异常 (成功后清除)"""
+        return self._last_error.get(code)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._last_error.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                    "stale": self.stale, "size": len(self._data), "errors": dict(self.errors)}
+
+
+quote_cache = QuoteCache(_fetch_upstream)
+
+
+def fetch_fund_data(code):
+    """获取单只基金的实时估值 (经过进程内缓存)；上游不可用时返回带 stale 标记的旧数据，都没有则返回 None"""
+    return quote_cache.get(code)
+
+
+def iter_fund_data(codes, deadline=BATCH_DEADLINE):
+    """并发获取多只基金，按到达顺序逐个产出 (code, data)
+
+    代码自动去重，缓存命中的立即产出；超过 deadline 后不再等待，
+    尚未开始的请求直接取消。
+    """
+    pending = []
+    for code in dict.fromkeys(codes):
+        data = quote_cache.peek(code)
+        if data is _MISSING:
+            pending.append(code)
+        else:
+            yield code, data
+    if not pending:
+        return
+    pool = _get_executor()
+    futures = {pool.submit(quote_cache.get, code): code for code in pending}
+    try:
+        for fut in as_completed(futures, timeout=deadline):
+            yield futures[fut], fut.result()
+    except FuturesTimeout:
+        metrics.inc("batch_deadline_missed", sum(not fut.done() for fut in futures))
+    finally:
+        for fut in futures:
+            fut.cancel()
+
+
+def fetch_fund_data_many(codes, deadline=BATCH_DEADLINE, on_result=None):
+    """批量获取行情，返回 {code: data}；超时未返回的代码不在结果中
+
+    on_result(code, data) 会在每个结果到达时回调，便于增量渲染。
+    """
+    results = {}
+    for code, data in iter_fund_data(codes, deadline=deadline):
+        results[code] = data
+        if on_result is not None:
+            on_result(code, data)
+    return results
+
+
+# ==========================================
+# 后台轮询与行情快照 (Poller & Snapshot)
+# ==========================================
+
+# stale 为 True 表示上游暂不可用，展示的是最近一次成功获取的数据
+Quote = namedtuple("Quote", "nav changePercent gztime name stale")
+# quotes 为只读映射 code -> Quote；内容变化时 version 递增
+QuoteSnapshot = namedtuple("QuoteSnapshot", "version quotes")
+
+
+def to_quote(data):
+    """把接口返回的 dict 转成 Quote，字段缺失返回 None"""
+    try:
+        return Quote(float(data["gsz"]), float(data["gszzl"]), data.get("gztime", ""), data.get("name", ""),
+                     bool(data.get("stale")))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class QuotePoller:
+    """后台线程定期刷新所有活跃会话关注的代码，并发布不可变快照"""
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self._sessions = {}  # session_id -> (codes, 最近续约时刻)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._snapshot = QuoteSnapshot(0, MappingProxyType({}))
+
+    def snapshot(self):
+        return self._snapshot
+
+    def watch(self, session_id, codes):
+        """登记/续约会话关注的代码；出现新代码时立即唤醒轮询"""
+        codes = frozenset(codes)
+        with self._lock:
+            self._sessions[session_id] = (codes, time.monotonic())
+        if not codes <= self._snapshot.quotes.keys():
+            self._wake.set()
+        self._ensure_started()
+
+    def _active_codes(self):
+        cutoff = time.monotonic() - SESSION_IDLE
+        with self._lock:
+            for sid in [sid for sid, (_, seen) in self._sessions.items() if seen < cutoff]:
+                del self._sessions[sid]
+            return set().union(*(codes for codes, _ in self._sessions.values()))
+
+    @metrics.timed("poll")
+    def poll_once(self):
+        """刷新一次；快照内容有变化时才发布新版本"""
+        codes = self._active_codes()
+        prev = self._snapshot
+        quotes = {code: prev.quotes[code] for code in codes if code in prev.quotes}
+        for code, data in iter_fund_data(codes):
+            quote = to_quote(data) if data else None
+            if quote is not None:
+                quotes[code] = quote
+                if not quote.stale:
+                    tick_recorder.record(code, quote.gztime, quote.nav)
+        if quotes != prev.quotes:
+            self._snapshot = QuoteSnapshot(prev.version + 1, MappingProxyType(quotes))
+        return self._snapshot
+
+    def _run(self):
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                metrics.inc("poll_errors", type=type(e).__name__)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="quote-poller", daemon=True)
+                    self._thread.start()
+
+
+quote_poller = QuotePoller()
@@ -0,0 +1,225 @@
+# ==========================================
+# 风险分析 (Risk Analytics)
+# 一组基金在最近 N 个交易日上对齐成一张对数收益率矩阵 (交易日 × 基金，缺失为 NaN)，
+# 同时维护两两相关所需的四个累加矩阵 (XᵀX、XᵀM、X²ᵀM、MᵀM，M 为非缺失掩码)：
+# 相关系数为逐对完整样本的 Pearson 相关，年化波动取自对角线。
+# 新一天的净值到达时，窗口向前滚动：只对新增 / 移出的行做外积加减，不重算整张矩阵。
+# 结果按 (基金集合, 区间) 缓存，数据版本不变时直接复用。
+# ==========================================
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from navstore import nav_store
+
+TRADING_DAYS = 252
+RISK_FREE = 0.02  # 年化无风险利率 (夏普比率)
+
+# 区间 -> 交易日数
+RISK_WINDOWS = {"3M": 63, "1Y": 252, "3Y": 756}
+
+# 两只基金的重叠交易日少于该值时不给出相关系数
+MIN_OVERLAP = 20
+
+RISK_CACHE_SIZE = 64
+
+
+def _log_returns(navs):
+    navs = np.asarray(navs, dtype=float)
+    return np.diff(np.log(navs))
+
+
+def max_drawdown(returns):
+    """对数收益率矩阵 (缺失按 0 计) 每列的最大回撤 (0~1)"""
+    cum = np.cumsum(np.nan_to_num(returns), axis=0)
+    if not len(cum):
+        return np.zeros(cum.shape[1:])
+    peak = np.maximum(np.maximum.accumulate(cum, axis=0), 0.0)
+    return 1 - np.exp(-(peak - cum).max(axis=0))
+
+
+class ReturnWindow:
+    """一组基金最近 window 个交易日的对齐收益率与相关累加量"""
+
+    def __init__(self, codes, window, store=nav_store):
+        self.codes = list(codes)
+        self.window = window
+        self.version = 0  # 每次滚动递增，结果缓存以此失效
+        self._store = store
+        self._memo = {}
+        self._rolled = 0
+        self._build()
+
+    def _build(self):
+        """从净值库完整构建 (窗口前多读一段，保证开头几天也有前一日净值)"""
+        store, n = self._store, len(self.codes)
+        per_code = []
+        self._versions = np.zeros(n, dtype=np.int64)
+        self._last_nav = np.full(n, np.nan)
+        self._last_date = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+        for j, code in enumerate(self.codes):
+            self._versions[j] = store.version(code)
+            dates, navs = store.recent(code, self.window * 2 + 1)
+            if len(navs):
+                self._last_nav[j] = navs[-1]
+                self._last_date[j] = dates[-1]
+            per_code.append((dates[1:], _log_returns(navs)))
+        calendar = np.unique(np.concatenate([d for d, _ in per_code])) if n else np.empty(0, "datetime64[D]")
+        self.dates = calendar[-self.window:]
+        self.returns = np.full((len(self.dates), n), np.nan)
+        for j, (dates, rets) in enumerate(per_code):
+            keep = dates >= self.dates[0] if len(self.dates) else np.zeros(len(dates), dtype=bool)
+            self.returns[np.searchsorted(self.dates, dates[keep]), j] = rets[keep]
+        self._sums = self._accumulate(self.returns)
+        self._rolled = 0
+
+    @staticmethod
+    def _accumulate(block):
+        """一段行对四个累加矩阵的贡献"""
+        mask = ~np.isnan(block)
+        x = np.where(mask, block, 0.0)
+        m = mask.astype(float)
+        return [x.T @ x, x.T @ m, (x * x).T @ m, m.T @ m]
+
+    def refresh(self):
+        """检查净值库是否有新的交易日并向前滚动；返回是否有变化"""
+        store = self._store
+        versions = np.fromiter((store.version(code) for code in self.codes), dtype=np.int64, count=len(self.codes))
+        changed = np.flatnonzero(versions != self._versions)
+        if not len(changed):
+            return False
+        # 净值库只追加：版本差即新增条数，直接取末尾几条
+        counts = versions[changed] - self._versions[changed]
+        parts = [store.recent(self.codes[j], int(k)) for j, k in zip(changed.tolist(), counts.tolist())]
+        dates = np.concatenate([d for d, _ in parts])
+        navs = np.concatenate([v for _, v in parts])
+        log_nav = np.log(navs)
+        cols = np.repeat(changed, counts)
+        if len(self.dates) and dates.min() <= self.dates[-1]:
+            # 迟到的净值落在窗口已有的日期上：重建
+            self._build()
+            self.version += 1
+            self._memo.clear()
+            return True
+        # 每只基金第一条新净值与上次最后一条相比，其余与前一条相比；此前没有净值的基金丢掉第一条
+        first = np.r_[0, np.cumsum(counts)[:-1]]
+        prev = np.r_[np.nan, log_nav[:-1]]
+        prev[first] = np.log(self._last_nav[changed])
+        rets = log_nav - prev
+        keep = ~np.isnan(prev)
+        self._last_nav[changed] = navs[first + counts - 1]
+        self._last_date[changed] = dates[first + counts - 1]
+        self._versions = versions
+        calendar = np.unique(dates[keep])
+        block = np.full((len(calendar), len(self.codes)), np.nan)
+        block[np.searchsorted(calendar, dates[keep]), cols[keep]] = rets[keep]
+        self._roll(calendar, block)
+        return True
+
+    def _roll(self, dates, block):
+        """追加新行、移出最旧的行，累加矩阵只做增量加减"""
+        returns = np.vstack([self.returns, block])
+        drop = max(0, len(returns) - self.window)
+        for total, add, sub in zip(self._sums, self._accumulate(block), self._accumulate(returns[:drop])):
+            total += add
+            total -= sub
+        self.returns = returns[drop:]
+        self.dates = np.concatenate([self.dates, dates])[drop:]
+        self.version += 1
+        self._memo.clear()
+        # 滚动满一个窗口后整体重算一次累加矩阵，消除浮点误差累积
+        self._rolled += len(dates)
+        if self._rolled >= self.window:
+            self._sums = self._accumulate(self.returns)
+            self._rolled = 0
+
+    def _cached(self, key, fn):
+        value = self._memo.get(key)
+        if value is None:
+            value = self._memo[key] = fn()
+        return value
+
+    def correlation(self):
+        """逐对完整样本的 Pearson 相关矩阵；重叠不足 MIN_OVERLAP 天的为 NaN"""
+        def compute():
+            sxy, sx, sxx, c = self._sums
+            with np.errstate(invalid="ignore", divide="ignore"):
+                var = c * sxx - sx * sx
+                corr = (c * sxy - sx * sx.T) / np.sqrt(var * var.T)
+            corr[c < MIN_OVERLAP] = np.nan
+            np.fill_diagonal(corr, np.where(np.diag(c) >= MIN_OVERLAP, 1.0, np.nan))
+            return np.clip(corr, -1.0, 1.0)
+        return self._cached("corr", compute)
+
+    def metrics(self):
+        """每只基金的年化收益、年化波动、最大回撤、夏普比率与样本天数 (dict of 数组)"""
+        def compute():
+            sxy, sx, sxx, c = self._sums
+            n = np.diag(c)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.diag(sx) / n
+                var = (np.diag(sxx) - n * mean * mean) / (n - 1)
+                vol = np.sqrt(np.maximum(var, 0) * TRADING_DAYS)
+                annual = mean * TRADING_DAYS
+                sharpe = (annual - RISK_FREE) / vol
+            short = n < MIN_OVERLAP
+            return {
+                "days": n.astype(int),
+                "return": np.where(short, np.nan, np.expm1(annual)),
+                "volatility": np.where(short, np.nan, vol),
+                "max_drawdown": np.where(short, np.nan, max_drawdown(self.returns)),
+                "sharpe": np.where(short, np.nan, sharpe),
+            }
+        return self._cached("metrics", compute)
+
+    def portfolio(self, weights):
+        """按权重 (与 codes 对齐) 合成的组合日收益率 (缺失按 0 计) 的风险指标"""
+        weights = np.asarray(weights, dtype=float)
+        if not len(self.returns) or weights.sum() <= 0:
+            return None
+        daily = np.expm1(np.nan_to_num(self.returns)) @ (weights / weights.sum())
+        rets = np.log1p(daily)
+        n = len(rets)
+        if n < MIN_OVERLAP:
+            return None
+        vol = rets.std(ddof=1) * np.sqrt(TRADING_DAYS)
+        annual = rets.mean() * TRADING_DAYS
+        return {
+            "days": n,
+            "return": float(np.expm1(annual)),
+            "volatility": float(vol),
+            "max_drawdown": float(max_drawdown(rets[:, None])[0]),
+            "sharpe": float((annual - RISK_FREE) / vol) if vol > 0 else float("nan"),
+        }
+
+
+class RiskEngine:
+    """按 (基金集合, 区间) 缓存 ReturnWindow；每次取用时检查并滚动到最新交易日"""
+
+    def __init__(self, store=nav_store, cache_size=RISK_CACHE_SIZE):
+        self._store = store
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def window(self, codes, period="1Y"):
+        """基金代码按排序去重后作为缓存键；返回的 ReturnWindow.codes 即为该顺序"""
+        key = (tuple(sorted(set(codes))), period)
+        with self._lock:
+            win = self._cache.get(key)
+            if win is None:
+                win = self._cache[key] = ReturnWindow(key[0], RISK_WINDOWS[period], self._store)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(key)
+                win.refresh()
+            return win
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+risk_engine = RiskEngine()
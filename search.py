@@ -0,0 +1,159 @@
+# ==========================================
+# 基金检索 (Fund Search Index)
+# 进程内只加载一次的全市场基金列表，支持代码前缀、中文名称子串、拼音首字母前缀。
+#
+# 基金列表文件默认为 data/fundcode_search.js (天天基金的全量列表格式：
+#   var r = [["000001","HXCZHH","华夏成长混合","混合型-灵活","HUAXIACHENGZHANGHUNHE"], ...];
+# 也支持包含 code, name, pinyin[, type] 列的 CSV。
+# 下载列表: python -m search --download
+# ==========================================
+import csv
+import json
+import os
+import sys
+import threading
+from collections import defaultdict
+from itertools import islice
+
+import numpy as np
+
+FUND_LIST_PATH = os.environ.get("GUGU_FUND_LIST", os.path.join("data", "fundcode_search.js"))
+FUND_LIST_URL = "http://fund.eastmoney.com/js/fundcode_search.js"
+
+# 排序分档：数值越小越靠前
+TIER_CODE = 0
+TIER_NAME_PREFIX = 1
+TIER_PINYIN = 2
+TIER_NAME = 3
+
+
+def load_fund_list(path=FUND_LIST_PATH):
+    """读取基金列表，返回 [(code, name, 拼音首字母, 类型)]；文件不存在返回空列表"""
+    if not os.path.exists(path):
+        return []
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8") as f:
+            return [(r["code"], r["name"], r.get("pinyin", ""), r.get("type", "")) for r in csv.DictReader(f)]
+    with open(path, encoding="utf-8-sig") as f:
+        text = f.read()
+    rows = json.loads(text[text.index("["):text.rindex("]") + 1])
+    return [(r[0], r[2], r[1], r[3]) for r in rows]
+
+
+class FundIndex:
+    """只读检索索引：代码/拼音为排序数组 (二分取前缀区间)，名称为字/二元组倒排表"""
+
+    def __init__(self, entries):
+        self.codes = [e[0] for e in entries]
+        self.names = [e[1] for e in entries]
+        self.types = [e[3] for e in entries]
+        self._row_of = {code: i for i, code in enumerate(self.codes)}
+
+        # 名称倒排表里存的是"按名称长度排序后的名次"，候选集天然按长度升序，无需再排序
+        self._by_rank = np.argsort([len(n) for n in self.names], kind="stable").astype(np.int32)
+        ranked_names = [self.names[i] for i in self._by_rank]
+        self._first_char = np.array([n[:1] for n in ranked_names], dtype="U1")
+        self._first_two = np.array([n[:2] for n in ranked_names], dtype="U2")
+
+        codes = np.array(self.codes, dtype=str)
+        self._code_order = np.argsort(codes, kind="stable")
+        self._code_sorted = codes[self._code_order]
+        pinyin = np.array([e[2].lower() for e in entries], dtype=str)
+        self._py_order = np.argsort(pinyin, kind="stable")
+        self._py_sorted = pinyin[self._py_order]
+
+        postings = defaultdict(list)
+        for rank, name in enumerate(ranked_names):
+            for gram in set(name) | {name[j:j + 2] for j in range(len(name) - 1)}:
+                postings[gram].append(rank)
+        self._postings = {g: np.array(rows, dtype=np.int32) for g, rows in postings.items()}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def get(self, code):
+        """按代码精确查找，返回 (code, name, type) 或 None"""
+        i = self._row_of.get(code)
+        return None if i is None else (self.codes[i], self.names[i], self.types[i])
+
+    @staticmethod
+    def _prefix(sorted_arr, order, prefix, k):
+        # 比数组定长还长的前缀不可能命中；上界用"末字符 +1"，避免整列转换成更宽的字符串类型
+        if len(prefix) > sorted_arr.dtype.itemsize // 4:
+            return order[:0]
+        lo = np.searchsorted(sorted_arr, prefix, side="left")
+        hi = np.searchsorted(sorted_arr, prefix[:-1] + chr(ord(prefix[-1]) + 1), side="left")
+        return order[lo:min(hi, lo + k)]
+
+    def _name_matches(self, query, k):
+        """名称子串匹配，返回 (以 query 开头的行, 其余包含 query 的行)，各自按名称长度升序取前 k"""
+        if len(query) == 1:
+            cand = self._postings.get(query)
+            head = self._first_char
+        else:
+            cand = None
+            for j in range(len(query) - 1):
+                rows = self._postings.get(query[j:j + 2])
+                if rows is None:
+                    return [], []
+                cand = rows if cand is None else np.intersect1d(cand, rows, assume_unique=True)
+            head = self._first_two
+        if cand is None or not len(cand):
+            return [], []
+        starts = head[cand] == query[:2]
+        if len(query) <= 2:
+            # 一两个字时倒排表已保证包含关系，首字匹配即为前缀命中，全程向量化
+            return list(self._by_rank[cand[starts][:k]]), list(self._by_rank[cand[~starts][:k]])
+        names = self.names
+        prefix = islice((i for i in self._by_rank[cand[starts]] if names[i].startswith(query)), k)
+        inner = islice((i for i in self._by_rank[cand] if query in names[i] and not names[i].startswith(query)), k)
+        return list(prefix), list(inner)
+
+    def search(self, query, k=10):
+        """返回按相关度排序的前 k 条 (code, name, type)"""
+        query = query.strip()
+        if not query or not len(self):
+            return []
+        ranked = []  # (分档, 行号)
+        if query.isdigit():
+            ranked += [(TIER_CODE, i) for i in self._prefix(self._code_sorted, self._code_order, query, k)]
+        elif query.isascii():
+            ranked += [(TIER_PINYIN, i) for i in self._prefix(self._py_sorted, self._py_order, query.lower(), k)]
+        else:
+            prefix, inner = self._name_matches(query, k)
+            ranked += [(TIER_NAME_PREFIX, i) for i in prefix] + [(TIER_NAME, i) for i in inner]
+        ranked.sort(key=lambda t: t[0])
+        seen, out = set(), []
+        for _, i in ranked:
+            if i not in seen:
+                seen.add(i)
+                out.append((self.codes[i], self.names[i], self.types[i]))
+                if len(out) == k:
+                    break
+        return out
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_fund_index():
+    """进程内共享的检索索引，首次调用时加载"""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = FundIndex(load_fund_list())
+    return _index
+
+
+if __name__ == "__main__":
+    if "--download" in sys.argv:
+        import requests
+
+        r = requests.get(FUND_LIST_URL, headers={"User-Agent": "Mozilla/5.0"}, timeout=30)
+        r.encoding = "utf-8"
+        os.makedirs(os.path.dirname(FUND_LIST_PATH) or ".", exist_ok=True)
+        with open(FUND_LIST_PATH, "w", encoding="utf-8") as f:
+            f.write(r.text)
+        print(f"{FUND_LIST_PATH}: {len(load_fund_list())} 只基金")
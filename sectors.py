@@ -0,0 +1,120 @@
+# ==========================================
+# 板块聚合 (Sector Board)
+# 按 sectorId 把基金分组，维护每个板块的家数、涨跌幅之和 (平均涨跌幅)、上涨/下跌家数。
+# 还没拿到过行情的行 (涨跌幅只是占位的 0) 不计入任何聚合，拿到行情后再计入。
+# 行情更新时只对变化的行做一次 bincount 增量累加 (差值 = 新贡献 - 旧贡献)，
+# 领涨/领跌基金只在读取时对有变化的板块重新计算。
+# ==========================================
+import threading
+
+import numpy as np
+
+
+class SectorBoard:
+    def __init__(self, capacity=64):
+        self._index = {}     # sectorId -> 板块序号
+        self.sector_ids = []
+        self._members = []   # 板块序号 -> 行号列表
+        self._member_arrays = {}
+        # 按行：所属板块序号、最近一次计入的涨跌幅、是否计入 (已有行情)
+        self._n = 0
+        self._sector = np.zeros(capacity, dtype=np.intp)
+        self._change = np.zeros(capacity)
+        self._live = np.zeros(capacity, dtype=bool)
+        # 按板块的累加量 (只含计入的行)
+        self._count = np.zeros(0, dtype=np.int64)
+        self._sum = np.zeros(0)
+        self._up = np.zeros(0, dtype=np.int64)
+        self._down = np.zeros(0, dtype=np.int64)
+        self._top = np.zeros(0, dtype=np.intp)  # 没有计入的行时为 -1
+        self._dirty = set()  # 需要重新计算领涨基金的板块
+        self._lock = threading.Lock()  # 基金表在会话间共享，读取时也会写入领涨缓存
+
+    def __len__(self):
+        return len(self.sector_ids)
+
+    def _grow_rows(self):
+        cap = max(1, len(self._sector)) * 2
+        for attr in ("_sector", "_change", "_live"):
+            old = getattr(self, attr)
+            new = np.zeros(cap, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, attr, new)
+
+    def _sector_of(self, sector_id):
+        k = self._index.get(sector_id)
+        if k is None:
+            k = len(self.sector_ids)
+            self._index[sector_id] = k
+            self.sector_ids.append(sector_id)
+            self._members.append([])
+            for attr in ("_count", "_sum", "_up", "_down"):
+                setattr(self, attr, np.append(getattr(self, attr), 0))
+            self._top = np.append(self._top, -1)
+        return k
+
+    def add(self, row, sector_id, change, live=True):
+        """登记一行 (行号需与 FundStore 一致、依次递增)；live 为 False 时先不计入"""
+        with self._lock:
+            if row == len(self._sector):
+                self._grow_rows()
+            k = self._sector_of(sector_id)
+            self._sector[row] = k
+            self._change[row] = change
+            self._live[row] = live
+            self._n = max(self._n, row + 1)
+            self._members[k].append(row)
+            self._member_arrays.pop(k, None)
+            if live:
+                self._count[k] += 1
+                self._sum[k] += change
+                self._up[k] += change > 0
+                self._down[k] += change < 0
+                self._dirty.add(k)
+
+    def update(self, rows, change, live=None):
+        """批量写入新的涨跌幅 (live 同时给出是否计入)；只有数值或计入状态变化的行参与累加"""
+        with self._lock:
+            rows = np.asarray(rows, dtype=np.intp)
+            new = np.asarray(change, dtype=float)
+            old, old_live = self._change[rows], self._live[rows]
+            new_live = old_live if live is None else np.asarray(live, dtype=bool)
+            moved = (new != old) | (new_live != old_live)
+            if not moved.any():
+                return
+            rows, new, old = rows[moved], new[moved], old[moved]
+            new_live, old_live = new_live[moved], old_live[moved]
+            sec = self._sector[rows]
+            n = len(self.sector_ids)
+            self._count += np.bincount(sec, new_live.astype(np.int64) - old_live, minlength=n).astype(np.int64)
+            self._sum += np.bincount(sec, np.where(new_live, new, 0.0) - np.where(old_live, old, 0.0), minlength=n)
+            self._up += np.bincount(sec, ((new > 0) & new_live).astype(np.int64) - ((old > 0) & old_live),
+                                    minlength=n).astype(np.int64)
+            self._down += np.bincount(sec, ((new < 0) & new_live).astype(np.int64) - ((old < 0) & old_live),
+                                      minlength=n).astype(np.int64)
+            self._change[rows] = new
+            self._live[rows] = new_live
+            self._dirty.update(np.unique(sec).tolist())
+
+    def _refresh_top(self):
+        change, live = self._change, self._live
+        for k in self._dirty:
+            members = self._member_arrays.get(k)
+            if members is None:
+                members = self._member_arrays[k] = np.array(self._members[k], dtype=np.intp)
+            members = members[live[members]]
+            self._top[k] = members[np.argmax(np.abs(change[members]))] if len(members) else -1
+        self._dirty.clear()
+
+    def summary(self):
+        """各板块的聚合结果 (按板块登记顺序)：dict of 数组，top 为波动最大的基金行号 (-1: 无行情)"""
+        with self._lock:
+            self._refresh_top()
+            return {
+                "sector_id": list(self.sector_ids),
+                "count": self._count.copy(),
+                "mean": np.divide(self._sum, self._count, out=np.zeros(len(self)), where=self._count > 0),
+                "up": self._up.copy(),
+                "down": self._down.copy(),
+                "top": self._top.copy(),
+            }
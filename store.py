@@ -0,0 +1,221 @@
+# ==========================================
+# 基金数据存储 (Fund Store)
+# 数值字段按列存放在 NumPy 数组里，id/code 通过字典 O(1) 定位到行号
+# 基金表由所有会话共享 (见 universe.py)：对外暴露的数组视图只读，写入只经过 add / update_quotes
+# ==========================================
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from sectors import SectorBoard
+
+# 分时/迷你图历史点数
+HISTORY_LEN = 50
+
+
+def _readonly(view):
+    view.flags.writeable = False
+    return view
+
+
+class FundStore:
+    """列式基金表：nav / changePercent / history 为数组，其余字段为按行对齐的列表"""
+
+    def __init__(self, capacity=64):
+        self._n = 0
+        self._nav = np.zeros(capacity)
+        self._change = np.zeros(capacity)
+        self._history = np.zeros((capacity, HISTORY_LEN))
+        self._history_version = np.zeros(capacity, dtype=np.int64)
+        self._quoted = np.zeros(capacity, dtype=bool)  # 拿到过行情 (有估值时间)；否则 nav 只是占位值
+        self.ids = []
+        self.codes = []
+        self.names = []
+        self.sector_ids = []
+        self.holdings = []
+        self.holdings_version = 0  # 新增基金 (带入持仓) 时递增 (穿透矩阵的缓存键)
+        self.gztimes = []
+        self.stale = []  # True: 上游暂不可用，nav 为最近一次成功获取的数据
+        self.sectors = SectorBoard(capacity)  # 板块聚合，随 add / update_quotes 增量维护
+        self._by_id = {}
+        self._by_code = {}
+        self._lock = threading.Lock()  # 多个会话线程可能同时追加新基金
+
+    def __len__(self):
+        return self._n
+
+    # 只暴露已使用部分的只读视图
+    @property
+    def nav(self):
+        return _readonly(self._nav[:self._n])
+
+    @property
+    def change(self):
+        return _readonly(self._change[:self._n])
+
+    @property
+    def quoted(self):
+        return _readonly(self._quoted[:self._n])
+
+    @property
+    def history(self):
+        return _readonly(self._history[:self._n])
+
+    @property
+    def history_version(self):
+        return _readonly(self._history_version[:self._n])
+
+    def _grow(self):
+        cap = max(1, len(self._nav)) * 2
+        for attr in ("_nav", "_change", "_history", "_history_version", "_quoted"):
+            old = getattr(self, attr)
+            new = np.zeros((cap,) + old.shape[1:], dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, attr, new)
+
+    def add(self, code, name, sector_id, nav, change_pct, history, holdings=(), history_version=0,
+            gztime="", stale=False):
+        """新增一只基金并返回行号；代码已存在时直接返回已有行"""
+        row = self._by_code.get(code)
+        if row is not None:
+            return row
+        with self._lock:
+            row = self._by_code.get(code)
+            if row is None:
+                row = self._append(code, name, sector_id, nav, change_pct, history, holdings, history_version,
+                                   gztime, stale)
+        return row
+
+    def _append(self, code, name, sector_id, nav, change_pct, history, holdings, history_version, gztime, stale):
+        if self._n == len(self._nav):
+            self._grow()
+        row = self._n
+        fund_id = f"fund-{code}"
+        self._nav[row] = nav
+        self._change[row] = change_pct
+        # 取最近 HISTORY_LEN 个点，不足时用最早的值在左侧补齐
+        hist = np.asarray(history, dtype=float)[-HISTORY_LEN:]
+        self._history[row] = np.pad(hist, (HISTORY_LEN - len(hist), 0), mode="edge") if len(hist) else 0.0
+        self._history_version[row] = history_version
+        self._quoted[row] = bool(gztime)
+        self.ids.append(fund_id)
+        self.codes.append(code)
+        self.names.append(name)
+        self.sector_ids.append(sector_id)
+        self.holdings.append(list(holdings))
+        self.gztimes.append(gztime)
+        self.stale.append(stale)
+        self._by_id[fund_id] = row
+        self.sectors.add(row, sector_id, change_pct, live=bool(gztime))
+        # 行数最后更新：其他线程读到的 len 之内的行总是完整的
+        self._n += 1
+        self.holdings_version += 1
+        self._by_code[code] = row
+        return row
+
+    def index_of_id(self, fund_id):
+        return self._by_id.get(fund_id)
+
+    def index_of_code(self, code):
+        return self._by_code.get(code)
+
+    def rows_of_ids(self, fund_ids):
+        """批量 id -> 行号，忽略不存在的 id"""
+        return np.array([r for r in map(self._by_id.get, fund_ids) if r is not None], dtype=np.intp)
+
+    def query(self, rows, sort_by=None, descending=True, keyword=""):
+        """在给定行号上先筛选 (代码/名称包含 keyword) 再排序，返回行号数组；分页在此之后切片"""
+        rows = np.asarray(rows, dtype=np.intp)
+        keyword = keyword.strip()
+        if keyword:
+            codes, names = self.codes, self.names
+            rows = rows[[keyword in codes[r] or keyword in names[r] for r in rows]].astype(np.intp)
+        if sort_by is None or not len(rows):
+            return rows
+        if sort_by == "name":
+            keys = np.array([self.names[r] for r in rows])
+        else:
+            keys = {"change": self._change, "nav": self._nav}[sort_by][rows]
+        order = np.argsort(keys, kind="stable")
+        return rows[order[::-1] if descending else order]
+
+    def update_quotes(self, rows, nav, change_pct, gztimes=None, stale=None):
+        """按行号批量写入最新行情 (可同时写入估值时间与陈旧标记)"""
+        with self._lock:
+            self._nav[rows] = nav
+            self._change[rows] = change_pct
+            live = None if gztimes is None else [bool(g) for g in gztimes]
+            self.sectors.update(rows, change_pct, live)
+            if gztimes is not None:
+                for row, gztime, is_stale in zip(rows, gztimes, stale):
+                    self.gztimes[row] = gztime
+                    self.stale[row] = is_stale
+                    self._quoted[row] = bool(gztime)
+
+    def row(self, i):
+        """把一行还原成视图使用的 dict (只在渲染可见行时调用)"""
+        return {
+            "row": i,
+            "id": self.ids[i],
+            "name": self.names[i],
+            "code": self.codes[i],
+            "nav": float(self._nav[i]),
+            "changePercent": float(self._change[i]),
+            "sectorId": self.sector_ids[i],
+            "history": self._history[i],
+            "historyVersion": int(self._history_version[i]),
+            "topHoldings": self.holdings[i],
+            "gztime": self.gztimes[i],
+            "stale": self.stale[i],
+        }
+
+
+class Watchlist:
+    """自选列表：保持加入顺序的集合 + 分组 -> id 索引"""
+
+    def __init__(self, ids=(), groups=None):
+        self._ids = dict.fromkeys(ids)
+        self._group_of = {}
+        self._members = defaultdict(dict)
+        for fund_id, group in (groups or {}).items():
+            self.set_group(fund_id, group)
+
+    def __contains__(self, fund_id):
+        return fund_id in self._ids
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, fund_id, group=None):
+        self._ids[fund_id] = None
+        if group is not None:
+            self.set_group(fund_id, group)
+
+    def remove(self, fund_id):
+        self._ids.pop(fund_id, None)
+        group = self._group_of.pop(fund_id, None)
+        if group is not None:
+            self._members[group].pop(fund_id, None)
+
+    def set_group(self, fund_id, group):
+        old = self._group_of.get(fund_id)
+        if old is not None:
+            self._members[old].pop(fund_id, None)
+        self._group_of[fund_id] = group
+        self._members[group][fund_id] = None
+
+    def group_of(self, fund_id):
+        return self._group_of.get(fund_id)
+
+    def groups(self):
+        return dict(self._group_of)
+
+    def ids(self, group='all'):
+        """分组内的自选 id；'all' 返回全部"""
+        if group == 'all':
+            return list(self._ids)
+        return [fund_id for fund_id in self._members.get(group, ()) if fund_id in self._ids]
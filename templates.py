@@ -0,0 +1,109 @@
+# ==========================================
+# 静态样式与 HTML 模板 (Templates)
+# 进程内只构建一次：CSS 去掉注释与多余空白，列表行模板折叠成单行，rerun 时只做 format
+# ==========================================
+import re
+
+
+def _minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,])\s*", r"\1", css).replace(";}", "}").strip()
+
+
+def _compact(html):
+    return re.sub(r">\s+<", "><", re.sub(r"\s+", " ", html)).strip()
+
+
+# 自定义 CSS 以复刻 React App 的视觉风格
+APP_CSS = "<style>" + _minify_css("""
+    /* 全局字体与背景 */
+    .stApp {
+        background-color: #f1f5f9;
+        font-family: "Inter", -apple-system, sans-serif;
+    }
+    
+    /* 隐藏 Streamlit 默认元素 */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+    
+    /* 颜色定义 */
+    :root {
+        --up-color: #f87171;
+        --down-color: #4ade80;
+        --dark-bg: #0f172a;
+    }
+
+    /* 资产卡片样式 */
+    .asset-card {
+        background: linear-gradient(135deg, #1e293b 0%, #0f172a 100%);
+        border-radius: 16px;
+        padding: 24px;
+        color: white;
+        box-shadow: 0 10px 25px -5px rgba(0, 0, 0, 0.1);
+        margin-bottom: 20px;
+        position: relative;
+        overflow: hidden;
+    }
+    
+    /* 基金列表项样式 */
+    .fund-item {
+        background-color: white;
+        border-radius: 12px;
+        padding: 16px;
+        border: 1px solid #e2e8f0;
+        margin-bottom: 12px;
+        transition: all 0.2s;
+    }
+    .fund-item:hover {
+        border-color: #cbd5e1;
+        box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.05);
+    }
+
+    /* 文字工具类 */
+    .text-up { color: #ef4444; font-weight: bold; }
+    .text-down { color: #22c55e; font-weight: bold; }
+    .text-mono { font-family: 'JetBrains Mono', monospace; }
+    .text-xs { font-size: 0.75rem; }
+    .text-sm { font-size: 0.875rem; }
+    .text-lg { font-size: 1.125rem; }
+    .font-bold { font-weight: 700; }
+    .text-slate-400 { color: #94a3b8; }
+    .text-slate-500 { color: #64748b; }
+    .text-slate-800 { color: #1e293b; }
+
+    /* 底部导航模拟 */
+    .bottom-nav {
+        position: fixed;
+        bottom: 0;
+        left: 0;
+        right: 0;
+        background: white;
+        border-top: 1px solid #e2e8f0;
+        padding: 10px;
+        text-align: center;
+        z-index: 999;
+    }
+    
+    /* 调整按钮样式以接近原生 */
+    .stButton button {
+        border-radius: 8px;
+        font-weight: bold;
+    }
+""") + "</style>"
+
+# 基金行：名称/代码、迷你图、净值/涨跌幅 (str.format 参数见 render_fund_row)
+FUND_ROW_NAME = _compact("""
+<div style="line-height:1.2;">
+    <div class="text-sm font-bold text-slate-800">{name}</div>
+    <div class="text-xs text-mono text-slate-400">{code}</div>
+</div>
+""")
+FUND_ROW_SPARKLINE = '<img src="{uri}" style="width:100%; height:40px;">'
+FUND_ROW_QUOTE = _compact("""
+<div style="text-align: right; line-height:1.2;">
+    <div class="text-sm font-bold text-mono text-slate-800">{nav}{stale_tag}</div>
+    <div class="text-xs font-bold text-mono {color_class}">{pct}</div>
+</div>
+""")
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def nav_store(tmp_path):
+    """用 fixtures/nav.csv 灌好的临时净值库"""
+    from navstore import NavStore
+
+    store = NavStore(str(tmp_path / "nav"))
+    store.ingest_csv(os.path.join(FIXTURES, "nav.csv"))
+    return store
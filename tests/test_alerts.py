@@ -0,0 +1,73 @@
+import numpy as np
+
+from alerts import CHANGE_ABS, DRAWDOWN, NAV_ABOVE, NAV_BELOW, AlertBook
+
+
+def fire(book, nav, change):
+    return sorted(book.evaluate(np.asarray(nav, dtype=float), np.asarray(change, dtype=float)).tolist())
+
+
+def test_thresholds_are_strict():
+    book = AlertBook()
+    above = book.set_rule("u", 0, NAV_ABOVE, 1.5)
+    below = book.set_rule("u", 0, NAV_BELOW, 1.0)
+    change = book.set_rule("u", 1, CHANGE_ABS, 2.0)
+    assert fire(book, [1.5, 1.0], [0.0, 2.0]) == []
+    assert fire(book, [1.51, 1.0], [0.0, -2.01]) == [above, change]
+    assert fire(book, [0.99, 1.0], [0.0, 0.0]) == [below]
+
+
+def test_fires_once_until_rearmed():
+    book = AlertBook()
+    i = book.set_rule("u", 0, NAV_ABOVE, 1.5)
+    assert fire(book, [1.6], [0.0]) == [i]
+    assert fire(book, [1.7], [0.0]) == []
+    assert fire(book, [1.4], [0.0]) == []
+    assert fire(book, [1.6], [0.0]) == [i]
+    assert len(book.pop_inbox("u")) == 2
+    assert book.pop_inbox("u") == []
+
+
+def test_drawdown_follows_cost():
+    book = AlertBook()
+    i = book.set_rule("u", 0, DRAWDOWN, 10.0, cost=2.0)
+    assert fire(book, [1.81], [0.0]) == []
+    assert fire(book, [1.79], [0.0]) == [i]
+    book.set_cost("u", 0, 1.9)
+    assert fire(book, [1.80], [0.0]) == []  # 回撤 5.3%，解除
+    book.set_cost("u", 0, 0.0)  # 清仓后不再提醒
+    assert fire(book, [0.1], [0.0]) == []
+
+
+def test_removed_slots_are_reused():
+    book = AlertBook(capacity=4)
+    for _ in range(100):
+        book.set_rule("u", 0, NAV_ABOVE, 1.5)
+        book.set_rule("v", 1, NAV_BELOW, 1.0)
+        book.remove_rule("u", 0, NAV_ABOVE)
+        book.remove_rule("v", 1, NAV_BELOW)
+    assert book._n == 2 and len(book) == 0
+    assert fire(book, [9.0, 0.0], [0.0, 0.0]) == []
+
+
+def test_remove_drops_unread_alerts_of_that_rule():
+    book = AlertBook()
+    book.set_rule("u", 0, NAV_ABOVE, 1.5)
+    book.set_rule("u", 1, NAV_ABOVE, 1.5)
+    fire(book, [2.0, 2.0], [0.0, 0.0])
+    book.remove_rule("u", 0, NAV_ABOVE)
+    book.set_rule("u", 1, NAV_BELOW, 0.5)  # 复用刚释放的规则 id
+    assert [(row, kind) for row, kind, *_ in book.pop_inbox("u")] == [(1, NAV_ABOVE)]
+
+
+def test_unquoted_rows_neither_fire_nor_rearm():
+    book = AlertBook()
+    below = book.set_rule("u", 0, NAV_BELOW, 2.0)
+    above = book.set_rule("u", 1, NAV_ABOVE, 1.5)
+    nav, change = np.array([1.0, 1.6]), np.zeros(2)
+    assert book.evaluate(nav, change, np.array([False, True])).tolist() == [above]
+    # 第 1 行暂时没有行情：占位净值低于阈值也不算解除，恢复后不重复提醒
+    nav[1] = 0.0
+    assert book.evaluate(nav, change, np.array([False, False])).tolist() == []
+    nav[1] = 1.6
+    assert book.evaluate(nav, change, np.array([True, True])).tolist() == [below]
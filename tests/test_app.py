@@ -0,0 +1,109 @@
+import os
+import tempfile
+from functools import partial
+
+import pytest
+
+from conftest import ROOT
+
+os.environ.setdefault("GUGU_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+APP = os.path.join(ROOT, "app.py")
+
+
+@pytest.fixture(scope="module")
+def stub_quotes():
+    import quotes
+    from bench.stub_server import start_stub_server
+
+    server, base = start_stub_server(latency=0)
+    saved, quotes.FUNDGZ_BASE = quotes.FUNDGZ_BASE, base
+    yield
+    quotes.FUNDGZ_BASE = saved
+    server.shutdown()
+
+
+def fragment_rerun(at, fragment_ids):
+    """只重跑给定的 fragment (与 run_every 定时触发的方式相同)，不重跑整页"""
+    from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+    from streamlit.testing.v1 import local_script_runner
+
+    saved = local_script_runner.RerunData
+    local_script_runner.RerunData = partial(RerunData, fragment_id_queue=list(fragment_ids), is_auto_rerun=True)
+    try:
+        at.run()
+    finally:
+        local_script_runner.RerunData = saved
+
+
+def test_fragment_reruns_keep_the_session_polled(stub_quotes):
+    from streamlit.testing.v1 import AppTest
+
+    from quotes import SESSION_IDLE, quote_poller
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.query_params["uid"] = "fragment-only"
+    at.run()
+    assert not at.exception
+    sid = at.session_state.session_id
+    fragments = list(at._fragment_storage._fragments)
+    assert fragments
+
+    # 让登记看起来已经闲置超过 SESSION_IDLE，之后只有磁贴 fragment 定时重跑
+    codes, seen = quote_poller._sessions[sid]
+    quote_poller._sessions[sid] = (codes, seen - SESSION_IDLE - 1)
+    fragment_rerun(at, fragments)
+    assert not at.exception
+
+    assert codes <= quote_poller._active_codes()
+    assert sid in quote_poller._sessions
+
+
+def test_debug_panel_does_not_override_the_process_flag(stub_quotes):
+    from streamlit.testing.v1 import AppTest
+
+    from metrics import metrics
+
+    saved = metrics.enabled
+    try:
+        metrics.enabled = True  # 相当于 GUGU_METRICS=1
+        at = AppTest.from_file(APP, default_timeout=60)
+        at.query_params["uid"] = "debug"
+        at.query_params["debug"] = "1"
+        at.run()
+        at.run()
+        assert not at.exception
+        assert metrics.enabled
+        toggle = at.toggle(key="debug_metrics")
+        assert toggle.value
+        toggle.set_value(False).run()
+        assert not metrics.enabled
+        # 别的会话重新打开后，这个会话的重跑不会再把它关掉
+        metrics.enabled = True
+        at.run()
+        assert metrics.enabled
+        assert at.toggle(key="debug_metrics").value
+    finally:
+        metrics.enabled = saved
+
+
+def test_statement_is_not_imported_twice(stub_quotes):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.query_params["uid"] = "import-twice"
+    at.run()
+    seeded = len(at.session_state.ledger)
+    statement = "基金代码,确认日期,业务类型,确认金额,确认净值,确认份额\n161725,2024/01/02,申购,1000,1.0,\n"
+    at.file_uploader[0].set_value(("s.csv", statement.encode(), "text/csv")).run()
+    start = next(b for b in at.button if b.label.startswith("开始导入"))
+    start.click().run()
+    assert not at.exception
+    assert len(at.session_state.ledger) == seeded + 1
+    assert not any(b.label.startswith("开始导入") for b in at.button)
+
+    # 再次选择同一个文件：提示已导入，不再出现导入按钮
+    at.file_uploader[0].set_value(("s.csv", statement.encode(), "text/csv")).run()
+    assert any("已导入过" in w.value for w in at.warning)
+    assert not any(b.label.startswith("开始导入") for b in at.button)
+    assert len(at.session_state.ledger) == seeded + 1
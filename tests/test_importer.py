@@ -0,0 +1,84 @@
+import io
+
+import numpy as np
+import pytest
+
+from importer import ERR_CODE, ERR_COLUMNS, ERR_DATE, ERR_NUMBER, ERR_SELL, ERR_SIDE, import_statement
+from ledger import Ledger
+from search import FundIndex
+from store import FundStore
+
+HEADER = "基金代码,确认日期,业务类型,确认金额,确认净值,确认份额\n"
+
+
+@pytest.fixture
+def env():
+    index = FundIndex([(f"{i:06d}", f"基金{i}", "JJ", "混合") for i in range(1, 6)])
+    return Ledger(), FundStore(), index
+
+
+def run(env, text, filename="s.csv", encoding="utf-8", **kwargs):
+    ledger, store, index = env
+    return import_statement(io.BytesIO(text.encode(encoding)), filename, ledger, store, index, **kwargs)
+
+
+def test_errors_are_classified_per_row(env):
+    text = HEADER + "\n".join([
+        "1,2024/01/02,申购,\"1,000.00\",1.0,",   # 代码补零、千分位
+        "999999,2024/01/03,申购,100,1.0,",
+        "000001,2024-13-01,申购,100,1.0,",
+        "000001,2024/01/04,转换,100,1.0,",
+        "000001,2024/01/05,申购,abc,1.0,",
+        "000001,2024/01/06",
+        "000001,2024/01/07,赎回,5000,1.0,",
+        "000002,20240108,申购,200,,100",           # 只有份额：净值 = 金额 / 份额
+        "",
+    ]) + "\n"
+    report = run(env, text)
+    assert report.template == "天天基金"
+    assert (report.total, report.imported) == (8, 2)
+    assert dict(report.errors) == {ERR_CODE: 1, ERR_DATE: 1, ERR_SIDE: 1, ERR_NUMBER: 1, ERR_COLUMNS: 1, ERR_SELL: 1}
+    assert sorted((line, reason) for line, _, reason in report.details) == [
+        (3, ERR_CODE), (4, ERR_DATE), (5, ERR_SIDE), (6, ERR_NUMBER), (7, ERR_COLUMNS), (8, ERR_SELL)]
+    ledger, store, _ = env
+    assert ledger.position_of(store.index_of_code("000001")) == (1000.0, 1000.0)
+    assert ledger.position_of(store.index_of_code("000002")) == (100.0, 200.0)
+
+
+def test_gbk_file_is_decoded(env):
+    report = run(env, HEADER + "000001,2024/01/02,申购,100,1.0,\n", encoding="gbk")
+    assert report.imported == 1
+
+
+def test_unknown_header_raises(env):
+    with pytest.raises(ValueError, match="无法识别表头"):
+        run(env, "a,b\n1,2\n")
+
+
+def statement(n, seed=0):
+    """n 行按日期正序的买卖记录 (卖出不超过此前买入)"""
+    rng = np.random.default_rng(seed)
+    days = np.datetime64("2020-01-01") + np.sort(rng.integers(0, 2000, n))
+    lines = []
+    for i, day in enumerate(days):
+        side = "赎回" if i % 4 == 3 else "申购"
+        lines.append(f"00000{i % 3 + 1},{day},{side},100.00,1.0,")
+    return lines
+
+
+@pytest.mark.parametrize("newest_first", [False, True])
+def test_chunked_import_matches_single_pass(newest_first):
+    lines = statement(500)
+    if newest_first:
+        lines = lines[::-1]
+    text = HEADER + "\n".join(lines) + "\n"
+    results = []
+    for chunk, batch in ((10_000, 10_000), (37, 16)):
+        env = (Ledger(), FundStore(), FundIndex([(f"{i:06d}", f"基金{i}", "JJ", "混合") for i in range(1, 4)]))
+        report = run(env, text, chunk=chunk, batch=batch)
+        assert (report.imported, report.failed) == (500, 0)
+        trades = env[0].trades()
+        assert (np.diff(trades["date"].astype(np.int64)) >= 0).all()
+        results.append(trades)
+    for key in ("fund_row", "side", "amount", "date"):
+        np.testing.assert_array_equal(results[0][key], results[1][key])
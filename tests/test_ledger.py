@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from ledger import BUY, SELL, Ledger
+
+
+def test_average_cost_is_weighted_by_amount():
+    ledger = Ledger()
+    assert ledger.append(0, BUY, 1000.0, 1.0, "2024-01-02") == 1000.0
+    assert ledger.append(0, BUY, 1000.0, 2.0, "2024-01-03") == 500.0
+    rows, shares, avg_cost = ledger.positions()
+    assert rows.tolist() == [0]
+    assert shares[0] == 1500.0
+    assert avg_cost[0] == pytest.approx(2000.0 / 1500.0)
+
+
+def test_sell_keeps_average_cost_and_releases_cost_pro_rata():
+    ledger = Ledger()
+    ledger.append(0, BUY, 1000.0, 1.0, "2024-01-02")
+    ledger.append(0, BUY, 1000.0, 2.0, "2024-01-03")
+    ledger.append(0, SELL, 750.0, 1.5, "2024-01-04")  # 500 份
+    shares, cost = ledger.position_of(0)
+    assert shares == pytest.approx(1000.0)
+    assert cost == pytest.approx(2000.0 * 1000.0 / 1500.0)
+
+
+def test_selling_everything_clears_the_position():
+    ledger = Ledger()
+    ledger.append(3, BUY, 100.0, 1.0, "2024-01-02")
+    ledger.append(3, SELL, 200.0, 2.0, "2024-01-03")
+    assert ledger.position_of(3) == (0.0, 0.0)
+    assert len(ledger.positions()[0]) == 0
+
+
+def test_oversell_and_bad_amount_are_rejected_without_recording():
+    ledger = Ledger()
+    ledger.append(0, BUY, 100.0, 1.0, "2024-01-02")
+    with pytest.raises(ValueError, match="持仓不足"):
+        ledger.append(0, SELL, 200.0, 1.0, "2024-01-03")
+    with pytest.raises(ValueError):
+        ledger.append(0, BUY, 0.0, 1.0, "2024-01-03")
+    assert len(ledger) == 1
+    assert ledger.position_of(0) == (100.0, 100.0)
+
+
+def test_extend_matches_sequential_append():
+    rng = np.random.default_rng(0)
+    n = 200
+    rows = rng.integers(0, 5, n)
+    sides = np.where(rng.random(n) < 0.3, SELL, BUY)
+    amounts = rng.uniform(10, 500, n)
+    navs = rng.uniform(0.8, 1.5, n)
+    dates = np.datetime64("2024-01-01") + np.arange(n)
+
+    one = Ledger()
+    for args in zip(rows, sides, amounts, navs, dates):
+        try:
+            one.append(*args)
+        except ValueError:
+            pass
+    batch = Ledger()
+    _, errors = batch.extend(rows, sides, amounts, navs, dates)
+
+    assert len(batch) == len(one) == n - len(errors)
+    assert batch.positions()[0].tolist() == one.positions()[0].tolist()
+    for row in range(5):
+        assert batch.position_of(row) == pytest.approx(one.position_of(row))
+
+
+def test_summary_totals():
+    ledger = Ledger()
+    ledger.append(0, BUY, 1000.0, 1.0, "2024-01-02")
+    ledger.append(1, BUY, 500.0, 2.0, "2024-01-02")
+    summary = ledger.summary(np.array([1.1, 2.0]), np.array([10.0, 0.0]))
+    assert summary["total_asset"] == pytest.approx(1100.0 + 500.0)
+    assert summary["total_gain"] == pytest.approx(100.0)
+    assert summary["day_gain"] == pytest.approx(100.0)
+
+
+def test_summary_leaves_unquoted_rows_out_of_totals():
+    ledger = Ledger()
+    ledger.append(0, BUY, 1000.0, 1.0, "2024-01-02")
+    ledger.append(1, BUY, 500.0, 2.0, "2024-01-02")
+    summary = ledger.summary(np.array([1.1, 1.0]), np.array([10.0, 0.0]), np.array([True, False]))
+    assert summary["unquoted"] == 1
+    assert summary["total_asset"] == pytest.approx(1100.0)
+    assert summary["total_gain"] == pytest.approx(100.0)
+    assert np.isnan(summary["market_vals"][1])
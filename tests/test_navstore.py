@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import FIXTURES
+
+ALL_DATES = ["2020-01-02", "2021-01-04", "2021-03-01", "2022-06-01",
+             "2023-01-03", "2023-12-01", "2023-12-15", "2024-01-02"]
+ALL_NAVS = [1.0, 1.1, 1.15, 1.2, 1.25, 1.3, 1.31, 1.32]
+
+
+def test_ingest_sorts_and_keeps_leading_zeros(nav_store):
+    assert nav_store.version("000001") == 8
+    assert nav_store.version("161725") == 2
+    assert nav_store.version("1") == 0
+
+
+@pytest.mark.parametrize("period, first", [("30D", 6), ("1Y", 4), ("3Y", 1), ("ALL", 0)])
+def test_range_slices(nav_store, period, first):
+    dates, navs = nav_store.range("000001", period)
+    np.testing.assert_array_equal(dates, np.array(ALL_DATES[first:], dtype="datetime64[D]"))
+    np.testing.assert_allclose(navs, ALL_NAVS[first:])
+
+
+def test_range_of_unknown_code_is_empty(nav_store):
+    for period in ("30D", "ALL"):
+        dates, navs = nav_store.range("999999", period)
+        assert len(dates) == len(navs) == 0
+
+
+def test_read_bounds_are_inclusive(nav_store):
+    dates, navs = nav_store.read("000001", start="2021-03-01", end="2023-01-03")
+    np.testing.assert_array_equal(dates, np.array(ALL_DATES[2:5], dtype="datetime64[D]"))
+    np.testing.assert_allclose(navs, ALL_NAVS[2:5])
+
+
+def test_reingest_only_appends_newer_dates(nav_store):
+    assert nav_store.ingest_csv(os.path.join(FIXTURES, "nav.csv")) == 0
+    assert nav_store.append("000001", ["2023-12-20", "2024-01-03", "2024-01-03"], [9.0, 1.33, 1.34]) == 1
+    dates, navs = nav_store.recent("000001", 2)
+    np.testing.assert_array_equal(dates, np.array(["2024-01-02", "2024-01-03"], dtype="datetime64[D]"))
+    np.testing.assert_allclose(navs, [1.32, 1.34])
+
+
+def test_nav_on(nav_store):
+    assert nav_store.nav_on("000001", "2023-12-15") == 1.31
+    assert nav_store.nav_on("000001", "2023-12-16") is None
+    assert nav_store.nav_on("999999", "2023-12-15") is None
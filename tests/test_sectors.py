@@ -0,0 +1,59 @@
+import numpy as np
+
+from sectors import SectorBoard
+
+
+def brute_force(sector, change, live, n):
+    count = np.bincount(sector[live], minlength=n)
+    mean = np.divide(np.bincount(sector[live], change[live], minlength=n), count,
+                     out=np.zeros(n), where=count > 0)
+    up = np.bincount(sector[live & (change > 0)], minlength=n)
+    down = np.bincount(sector[live & (change < 0)], minlength=n)
+    return count, mean, up, down
+
+
+def test_incremental_matches_brute_force():
+    rng = np.random.default_rng(0)
+    rows, n = 300, 7
+    sector = rng.integers(0, n, rows)
+    change = np.round(rng.normal(0, 1, rows), 2)
+    live = rng.random(rows) < 0.7
+    board = SectorBoard(capacity=4)
+    for k in range(n):  # 先按序号登记全部板块，让序号与 sector 对齐
+        board._sector_of(f"s{k}")
+    for row in range(rows):
+        board.add(row, f"s{sector[row]}", change[row], bool(live[row]))
+    for _ in range(20):
+        moved = rng.choice(rows, 40, replace=False)
+        change[moved] = np.round(rng.normal(0, 1, 40), 2)
+        live[moved] |= rng.random(40) < 0.5
+        board.update(moved, change[moved], live[moved])
+        result = board.summary()
+        count, mean, up, down = brute_force(sector, change, live, n)
+        np.testing.assert_array_equal(result["count"], count)
+        np.testing.assert_allclose(result["mean"], mean)
+        np.testing.assert_array_equal(result["up"], up)
+        np.testing.assert_array_equal(result["down"], down)
+        for k, top in enumerate(result["top"]):
+            members = np.flatnonzero((sector == k) & live)
+            if len(members):
+                assert live[top] and abs(change[top]) == np.abs(change[members]).max()
+            else:
+                assert top == -1
+
+
+def test_unquoted_rows_are_left_out_until_quoted():
+    board = SectorBoard()
+    board.add(0, "tech", 2.0)
+    board.add(1, "tech", 0.0, live=False)  # 占位涨跌幅
+    board.add(2, "med", 0.0, live=False)
+    result = board.summary()
+    assert result["count"].tolist() == [1, 0]
+    assert result["mean"].tolist() == [2.0, 0.0]
+    assert result["top"].tolist() == [0, -1]
+    board.update([1, 2], [-3.0, 1.0], [True, True])
+    result = board.summary()
+    assert result["count"].tolist() == [2, 1]
+    assert result["mean"].tolist() == [-0.5, 1.0]
+    assert (result["up"].tolist(), result["down"].tolist()) == ([1, 1], [1, 0])
+    assert result["top"].tolist() == [1, 2]
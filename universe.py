@@ -0,0 +1,110 @@
+# ==========================================
+# 共享基金池 (Fund Universe)
+# 基金元数据、实时行情、历史净值、重仓持股每个进程只保存一份 (一张 FundStore)，
+# 所有会话共享同一个对象且只读；会话里只保留自己的交易流水、自选和分组。
+# 基金池只追加行 (搜索打开新基金 / 老用户恢复)，已有行号不变，会话里保存的行号始终有效。
+# 基金池只存数据，不决定轮询哪些代码：每个会话按自己的持仓与自选登记 (见 app.py sync_quotes)。
+# 行情写入由最先看到新快照版本的会话完成，每个版本只写一次，写入后统一判断全部用户的价格提醒。
+# ==========================================
+import threading
+
+import numpy as np
+
+from alerts import alert_book
+from navstore import nav_store
+from quotes import fetch_fund_data, fetch_fund_data_many
+from store import FundStore
+
+# 启动时加载的基金 (代码, 默认名称, 板块ID)
+INIT_FUNDS = [
+    ("161725", "招商中证白酒", "cons"),
+    ("005827", "易方达蓝筹", "cons"),
+    ("320007", "诺安成长", "tech"),
+    ("003096", "中欧医疗", "med"),
+    ("000001", "华夏上证50", "fin"),  # 替代余额宝
+    ("001156", "申万新能源", "enrg"),
+    ("161028", "富国中证", "prop"),
+    ("000001", "上证指数", "fin"),  # 用于市场指数模拟
+]
+
+_lock = threading.Lock()
+_universe = None
+_synced_version = 0
+
+
+def _history(code, nav):
+    """本地历史净值库的最近 50 条及其版本号；没有数据时用当前净值兜底 (盘中迷你图读分时记录)"""
+    stored = nav_store.tail(code, 50)
+    if len(stored):
+        return stored, nav_store.version(code)
+    return [nav], 0
+
+
+def _mock_holdings():
+    """接口不提供持仓，保留模拟持仓结构"""
+    return [
+        {"name": f"股票-{j}", "percent": np.random.randint(2, 9), "change": np.random.uniform(-3, 3)}
+        for j in range(1, 11)
+    ]
+
+
+def build_universe(funds=INIT_FUNDS):
+    """并发批量获取行情并构建基金表 (重复代码只保留第一条，超时的代码走默认值)"""
+    store = FundStore()
+    quotes = fetch_fund_data_many([code for code, _, _ in funds])
+    for code, default_name, sector_id in funds:
+        data = quotes.get(code)
+        nav = float(data['gsz']) if data else 1.0
+        change_pct = float(data['gszzl']) if data else 0.0
+        history, version = _history(code, nav)
+        store.add(code, data['name'] if data else default_name, sector_id, nav, change_pct, history,
+                  _mock_holdings(), version,
+                  gztime=data.get('gztime', '') if data else '', stale=bool(data and data.get('stale')))
+    return store
+
+
+def get_universe():
+    """进程内唯一的基金池；第一次调用时构建"""
+    global _universe
+    if _universe is None:
+        with _lock:
+            if _universe is None:
+                _universe = build_universe()
+    return _universe
+
+
+def ensure_fund(code, name, sector_id="all"):
+    """基金池里没有的代码先获取行情再追加一行 (无持仓数据)，返回行号"""
+    store = get_universe()
+    row = store.index_of_code(code)
+    if row is not None:
+        return row
+    data = fetch_fund_data(code)
+    nav = float(data['gsz']) if data else 1.0
+    change_pct = float(data['gszzl']) if data else 0.0
+    history, version = _history(code, nav)
+    # 并发追加同一代码时 add 返回先到的那一行
+    return store.add(code, data['name'] if data else name, sector_id, nav, change_pct, history, (), version,
+                     gztime=data.get('gztime', '') if data else '', stale=bool(data and data.get('stale')))
+
+
+def sync(snap):
+    """把轮询快照写入基金池；同一版本只写一次"""
+    global _synced_version
+    if snap.version <= _synced_version:
+        return
+    store = get_universe()
+    with _lock:
+        if snap.version <= _synced_version:
+            return
+        rows, quotes = [], []
+        for row, code in enumerate(store.codes[:len(store)]):
+            q = snap.quotes.get(code)
+            if q is not None:
+                rows.append(row)
+                quotes.append(q)
+        if rows:
+            store.update_quotes(rows, [q.nav for q in quotes], [q.changePercent for q in quotes],
+                                [q.gztime for q in quotes], [q.stale for q in quotes])
+            alert_book.evaluate(store.nav, store.change, store.quoted)
+        _synced_version = snap.version